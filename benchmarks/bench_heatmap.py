@@ -0,0 +1,40 @@
+"""
+Benchmarks of the rendering of the prediction heatmap of one page of ROIs over a long time series, drawn by
+draw_heatmap() as in draw_predictions_heatmap() but on an Agg canvas
+"""
+from standins import CLASS_NAMES
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from roi_classification.heatmap import downsample_time, draw_heatmap, page_slice
+
+N_ROI, N_FRAMES = 500, 10000
+
+
+def setup():
+    global predictions
+    scores = np.random.default_rng(0).random((N_ROI, N_FRAMES, len(CLASS_NAMES)), dtype=np.float32)
+    predictions = scores / scores.sum(axis=-1, keepdims=True)
+
+
+def render(mode, downsampling):
+    rows, _ = page_slice(0, 100, N_ROI)
+    figure = Figure()
+    canvas = FigureCanvasAgg(figure)
+    draw_heatmap(figure.add_subplot(), predictions[rows], [f'Pos0_{i}' for i in range(N_ROI)[rows]], CLASS_NAMES,
+                 mode=mode, downsampling=downsampling)
+    canvas.draw()
+
+
+def time_downsample_time():
+    downsample_time(predictions, 2000, method='max')
+
+
+def time_render_scores():
+    render('scores', 'max')
+
+
+def time_render_argmax():
+    render('argmax', 'argmax')
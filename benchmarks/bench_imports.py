@@ -0,0 +1,18 @@
+"""
+Startup cost of the plugin packages, each imported in a fresh interpreter
+"""
+from standins import ROOT  # noqa: F401 (puts the repository and tools on the path)
+
+from plugin_import_times import measure, plugin_packages
+
+
+def _track_import(package):
+    def track():
+        return measure(package).get('seconds', float('nan'))
+    track.__name__ = f'track_import_{package}'
+    track.unit = 'seconds'
+    return track
+
+
+for _package in plugin_packages():
+    globals()[f'track_import_{_package}'] = _track_import(_package)
@@ -0,0 +1,63 @@
+"""
+Benchmarks of the inference run by test_model() on a list of image files, through classify_files() and the model cache
+as in run_test_model(), with a stand-in network module building a tiny Keras model having the same inputs and outputs
+as the classification networks
+"""
+import os
+from types import ModuleType
+
+from standins import CLASS_NAMES, temporary_directory
+
+import numpy as np
+import tifffile
+
+from roi_classification.inference import ModelCache, classify_files, iter_batches
+
+N_IMAGES, SIZE = 256, (224, 224)
+
+
+def tiny_model(load_weights=False):
+    """
+    Build a model taking (batch, 1, 224, 224, 3) sequences and returning features and class probabilities
+
+    :param load_weights: ignored, the model has random weights
+    :type load_weights: bool
+    :return: the model
+    :rtype: keras.Model
+    """
+    import keras
+    inputs = keras.Input(shape=(1, *SIZE, 3))
+    features = keras.layers.TimeDistributed(keras.layers.Conv2D(8, 3, strides=8, activation='relu'))(inputs)
+    pooled = keras.layers.TimeDistributed(keras.layers.GlobalAveragePooling2D())(features)
+    predictions = keras.layers.Dense(len(CLASS_NAMES), activation='softmax')(pooled)
+    return keras.Model(inputs=inputs, outputs=[pooled, predictions])
+
+
+network = ModuleType('tiny_network')
+network.load_model = tiny_model
+network.loadWeights = lambda model, filename=None: None
+
+
+def setup():
+    global paths, models
+    directory = temporary_directory()
+    rng = np.random.default_rng(0)
+    paths = []
+    for i in range(N_IMAGES):
+        paths.append(os.path.join(directory, f'roi{i}.tif'))
+        tifffile.imwrite(paths[-1], rng.integers(0, 65535, (60, 60, 3), dtype=np.uint16))
+    models = ModelCache()
+    models.get(network)
+
+
+def time_read_images():
+    for _ in iter_batches(paths):
+        pass
+
+
+def time_run_test_model():
+    classify_files(models, network, None, paths)
+
+
+def time_run_test_model_cold_cache():
+    classify_files(ModelCache(), network, None, paths)
@@ -0,0 +1,36 @@
+"""
+Benchmarks of the saving and listing of results by the result_db_example plugin in a temporary SQLite project
+"""
+from standins import Project, temporary_directory
+
+import sqlalchemy
+
+from result_db_example import Results, results_store
+
+N_ROWS = 10000
+
+
+def setup():
+    global project
+    project = Project(temporary_directory(), n_fov=100, rois_per_fov=20, n_frames=1, size=(120, 120),
+                      images=False)
+    sqlalchemy.Table('FOV', Results.metadata, autoload_with=project.repository.engine, extend_existing=True)
+    results_store.create_schema(project.repository.engine)
+    rows = [{'name': fov.name, 'fov': fov.id_} for fov in project.fovs.values()]
+    results_store.insert(project, rows * (N_ROWS // len(rows)))
+
+
+def time_insert_results():
+    results_store.insert(project, [{'name': fov.name, 'fov': fov.id_} for fov in project.fovs.values()])
+
+
+def time_list_results_first_page():
+    results_store.list_with_roi_counts(project, limit=200)
+
+
+def time_list_results_all():
+    results_store.list_with_roi_counts(project)
+
+
+def time_fov_names():
+    results_store.fov_names(project)
@@ -0,0 +1,45 @@
+"""
+Benchmarks of the assembly of ROI image sequences: extraction of ROI crops from FOV stacks through
+get_rgb_images_from_stacks() and rendering of the sequences as a mosaic
+"""
+from standins import ParentPlugin, Project, temporary_directory
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from roi_classification.batch import extract_roi_batch
+from roi_classification.cache import FrameCache, group_rois_by_fov
+from roi_classification.mosaic import build_mosaic, draw_mosaic
+
+N_FRAMES = 20
+
+
+def setup():
+    global project, plugin, fov_rois, cache, batch, labels
+    project = Project(temporary_directory(), n_fov=2, rois_per_fov=50, n_frames=N_FRAMES)
+    plugin = ParentPlugin(roi_list=project.rois)
+    fov_rois = group_rois_by_fov(project, project.rois)
+    cache = FrameCache()
+    batch = extract_roi_batch(plugin, fov_rois, project.rois, range(N_FRAMES), cache)
+    labels = np.random.default_rng(0).integers(0, len(plugin.class_names), batch.shape[:2])
+
+
+def time_extract_roi_batch_cold():
+    extract_roi_batch(plugin, fov_rois, project.rois, range(N_FRAMES), FrameCache())
+
+
+def time_extract_roi_batch_cached():
+    extract_roi_batch(plugin, fov_rois, project.rois, range(N_FRAMES), cache)
+
+
+def time_build_mosaic():
+    build_mosaic(batch, labels=labels, colours=np.eye(len(plugin.class_names), 3, dtype=np.float32))
+
+
+def time_draw_mosaic():
+    figure = Figure()
+    canvas = FigureCanvasAgg(figure)
+    draw_mosaic(figure.add_subplot(), batch, labels, [roi.name for roi in project.rois], list(range(N_FRAMES)),
+                plugin.class_names)
+    canvas.draw()
@@ -0,0 +1,102 @@
+"""
+Run the benchmarks of the plugins' hot paths. Benchmarks are functions of the bench_*.py modules of this directory
+following asv naming: time_* functions are timed, track_* functions return the value to report. A module may define a
+setup() function that is called once before its benchmarks. Modules whose dependencies are missing are skipped.
+Usage, from the repository root:
+
+    python benchmarks/run.py [-k pattern] [--repeat N] [--json FILE]
+"""
+import argparse
+import glob
+import importlib
+import json
+import os
+import statistics
+import sys
+import time
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+
+
+def discover(pattern=None):
+    """
+    Import the benchmark modules and list their benchmarks
+
+    :param pattern: a substring that benchmark names must contain
+    :type pattern: str
+    :return: (module name, module, function name) tuples
+    :rtype: list of tuples
+    """
+    sys.path.insert(0, BENCHMARKS)
+    benchmarks = []
+    for path in sorted(glob.glob(os.path.join(BENCHMARKS, 'bench_*.py'))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        try:
+            module = importlib.import_module(name)
+        except ImportError as e:
+            print(f'{name}: skipped, {e}', file=sys.stderr)
+            continue
+        benchmarks.extend((name, module, function) for function in sorted(vars(module))
+                          if function.startswith(('time_', 'track_'))
+                          and (pattern is None or pattern in f'{name}.{function}'))
+    return benchmarks
+
+
+def run(benchmarks, repeat=5):
+    """
+    Run benchmarks
+
+    :param benchmarks: the benchmarks as returned by discover()
+    :type benchmarks: list of tuples
+    :param repeat: the number of times each time_* benchmark is run
+    :type repeat: int
+    :return: the results keyed by benchmark name
+    :rtype: dict
+    """
+    results = {}
+    set_up = set()
+    skipped = set()
+    for name, module, function in benchmarks:
+        if name in skipped:
+            continue
+        if name not in set_up and hasattr(module, 'setup'):
+            try:
+                module.setup()
+            except ImportError as e:
+                print(f'{name}: skipped, {e}', file=sys.stderr)
+                skipped.add(name)
+                continue
+        set_up.add(name)
+        if function.startswith('track_'):
+            results[f'{name}.{function}'] = {'value': getattr(module, function)()}
+            continue
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            getattr(module, function)()
+            timings.append(time.perf_counter() - start)
+        results[f'{name}.{function}'] = {'min': min(timings), 'median': statistics.median(timings),
+                                         'repeat': repeat}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-k', dest='pattern', help='only run benchmarks whose name contains this pattern')
+    parser.add_argument('--repeat', type=int, default=5, help='the number of runs of each time_* benchmark')
+    parser.add_argument('--json', help='save the results to this JSON file')
+    args = parser.parse_args()
+
+    results = run(discover(args.pattern), repeat=args.repeat)
+    for name, result in results.items():
+        if 'value' in result:
+            print(f'{name:<60}{result["value"]:>12.4f}')
+        else:
+            print(f'{name:<60}{result["min"]:>12.4f} s (median {result["median"]:.4f} s)')
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""
+Headless stand-ins for the PyDetecDiv objects used by the plugins, so that their hot paths can be benchmarked without
+a running application nor real data: a temporary SQLite project with FOV and ROI tables, FOVs whose image resources are
+synthetic TIFF stacks, and a parent ROI classification plugin cropping ROIs from them. Plugin packages are imported
+without their plugin class, so neither the application nor PySide6 are needed; benchmarks reading images need tifffile,
+and inference benchmarks TensorFlow and the pydetecdiv image library.
+"""
+import atexit
+import os
+import sys
+import tempfile
+from types import SimpleNamespace
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import matplotlib
+
+matplotlib.use('Agg')
+
+import numpy as np
+import sqlalchemy
+from sqlalchemy import Column, ForeignKey, Integer, MetaData, String, Table
+from sqlalchemy.orm import Session
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'tools')]
+
+CLASS_NAMES = ['clog', 'dead', 'empty', 'large', 'small', 'unbud']
+
+
+def temporary_directory():
+    """
+    Create a temporary directory that is removed at exit
+
+    :return: the directory path
+    :rtype: str
+    """
+    directory = tempfile.TemporaryDirectory(prefix='pydetecdiv_benchmarks_')
+    atexit.register(directory.cleanup)
+    return directory.name
+
+
+def write_stack(path, n_frames, height, width, n_channels=3, seed=0):
+    """
+    Write a synthetic 16-bit (T, C, Y, X) TIFF stack
+
+    :param path: the file path
+    :type path: str
+    :param n_frames: the number of frames
+    :type n_frames: int
+    :param height: the image height
+    :type height: int
+    :param width: the image width
+    :type width: int
+    :param n_channels: the number of channels
+    :type n_channels: int
+    :param seed: the seed of the random generator
+    :type seed: int
+    """
+    import tifffile
+    rng = np.random.default_rng(seed)
+    tifffile.imwrite(path, rng.integers(0, 65535, (n_frames, n_channels, height, width), dtype=np.uint16))
+
+
+class ImageResourceData:
+    """
+    Stand-in for image resource data reading frames from a memory-mapped TIFF stack
+    """
+
+    def __init__(self, path):
+        import tifffile
+        self.stack = tifffile.memmap(path)
+
+    def image(self, C=0, T=0):
+        return self.stack[T, C]
+
+
+class FOV:
+    """
+    Stand-in for a FOV backed by a TIFF stack
+    """
+
+    def __init__(self, id_, name, path):
+        self.id_ = id_
+        self.name = name
+        self.path = path
+
+    def image_resource(self):
+        return SimpleNamespace(image_resource_data=lambda: ImageResourceData(self.path))
+
+
+class ROI:
+    """
+    Stand-in for a ROI
+    """
+
+    def __init__(self, id_, name, fov, x, y, width, height):
+        self.id_ = id_
+        self.name = name
+        self.fov = fov
+        self.x, self.y, self.width, self.height = x, y, width, height
+
+
+class ParentPlugin:
+    """
+    Stand-in for the parent ROI classification plugin
+    """
+    class_names = CLASS_NAMES
+
+    def __init__(self, roi_list=None, predictions=None):
+        self.roi_list = roi_list
+        self.predictions = predictions
+
+    @staticmethod
+    def get_rgb_images_from_stacks(imgdata, roi_list, t):
+        frame = np.stack([imgdata.image(C=c, T=t) for c in range(3)], axis=-1).astype(np.float32) / 65535
+        return [frame[roi.y:roi.y + roi.height, roi.x:roi.x + roi.width] for roi in roi_list]
+
+
+class Project:
+    """
+    Stand-in for a project stored in a temporary SQLite database with FOV and ROI tables. FOV image stacks are only
+    written if images is True.
+    """
+
+    def __init__(self, directory, n_fov=2, rois_per_fov=50, n_frames=20, size=(512, 512), roi_size=(60, 60),
+                 images=True):
+        self.repository = SimpleNamespace()
+        self.repository.engine = sqlalchemy.create_engine(f'sqlite:///{os.path.join(directory, "project.db")}')
+        metadata = MetaData()
+        fov_table = Table('FOV', metadata, Column('id_', Integer, primary_key=True), Column('name', String))
+        roi_table = Table('ROI', metadata, Column('id_', Integer, primary_key=True), Column('name', String),
+                          Column('fov', Integer, ForeignKey('FOV.id_'), index=True))
+        metadata.create_all(self.repository.engine)
+        self.repository.session = Session(self.repository.engine)
+
+        self.fovs = {}
+        self.rois = []
+        per_row = size[1] // roi_size[1]
+        for f in range(1, n_fov + 1):
+            path = os.path.join(directory, f'fov{f}.tif')
+            if images:
+                write_stack(path, n_frames, *size, seed=f)
+            self.fovs[f] = FOV(f, f'Pos{f}', path)
+            for r in range(rois_per_fov):
+                y, x = divmod(r, per_row)
+                self.rois.append(ROI(len(self.rois) + 1, f'Pos{f}_{r}', f,
+                                     x * roi_size[1], (y * roi_size[0]) % (size[0] - roi_size[0]), *roi_size[::-1]))
+        with self.repository.engine.begin() as connection:
+            connection.execute(fov_table.insert(), [{'id_': fov.id_, 'name': fov.name} for fov in self.fovs.values()])
+            connection.execute(roi_table.insert(), [{'id_': roi.id_, 'name': roi.name, 'fov': roi.fov}
+                                                    for roi in self.rois])
+
+    def get_linked_objects(self, obj_type, obj):
+        return [self.fovs[obj.fov]] if obj_type == 'FOV' else []
+
+    def commit(self):
+        self.repository.session.commit()
@@ -0,0 +1,13 @@
+"""
+A plugin controlling the instrumentation of plugin actions: recording of action metrics to a file and profiling of
+actions. The instrumentation itself is in the metrics module, that other plugins use to declare their actions and
+report their counters. The plugin class and its GUI dependencies are imported on first access, so that the metrics
+module can be used without the application.
+"""
+
+
+def __getattr__(name):
+    if name == 'Plugin':
+        from .plugin import Plugin
+        return Plugin
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
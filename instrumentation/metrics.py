@@ -0,0 +1,187 @@
+"""
+Lightweight instrumentation of plugin actions. An action is a function decorated with instrumented() or a block run
+in the action() context manager. Each action produces one record holding its wall time and the counters accumulated
+while it runs: database queries and their duration (captured for all engines through SQLAlchemy events), bytes of
+image data read and model prediction time, as reported by the plugins with add() and timed(). Records are logged as
+JSON by the pydetecdiv.instrumentation logger and appended to a JSON lines metrics file when one is set. Actions can
+also be profiled with cProfile, one .prof file per action.
+
+Metrics file and profiling directory are initialized from the PYDETECDIV_METRICS and PYDETECDIV_PROFILE environment
+variables. Records carry the process id and thread id so that they can be matched with external samplers such as
+py-spy.
+
+The other plugins of this repository require the instrumentation plugin and all import their instrumentation from
+this module, which is the single import contract: it depends on SQLAlchemy only, not on the application or Qt, and
+records are only written to a file or profiled when enabled.
+"""
+import contextvars
+import cProfile
+from contextlib import contextmanager
+from functools import wraps
+import json
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger('pydetecdiv.instrumentation')
+
+#: Where records and profiles are written, None to disable
+settings = {
+    'metrics_file': os.environ.get('PYDETECDIV_METRICS') or None,
+    'profile_dir': os.environ.get('PYDETECDIV_PROFILE') or None,
+}
+
+_active = contextvars.ContextVar('active_actions', default=())
+_write_lock = threading.Lock()
+
+
+class ActionRecord:
+    """
+    The measures of one action run
+    """
+
+    def __init__(self, name, **context):
+        self.name = name
+        self.context = context
+        self.counters = {}
+        self.start = time.time()
+        self.wall_seconds = None
+        self.status = 'running'
+
+    def add(self, counter, value=1):
+        """
+        Add a value to a counter
+
+        :param counter: the counter name
+        :type counter: str
+        :param value: the value to add
+        :type value: int or float
+        """
+        self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def as_dict(self):
+        """
+        The record as a JSON serializable dictionary
+        """
+        return {'action': self.name, 'status': self.status, 'start': self.start, 'wall_seconds': self.wall_seconds,
+                'pid': os.getpid(), 'thread': threading.get_native_id(), **self.context, **self.counters}
+
+
+def add(counter, value=1):
+    """
+    Add a value to a counter of all actions running in the current thread. This does nothing outside of actions.
+
+    :param counter: the counter name, e.g. 'image_bytes_read'
+    :type counter: str
+    :param value: the value to add
+    :type value: int or float
+    """
+    for record in _active.get():
+        record.add(counter, value)
+
+
+@contextmanager
+def timed(counter):
+    """
+    Time a block of code, adding its duration to the {counter}_seconds counter and incrementing the {counter}_calls
+    counter of running actions
+
+    :param counter: the counter name, e.g. 'predict'
+    :type counter: str
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add(f'{counter}_seconds', time.perf_counter() - start)
+        add(f'{counter}_calls')
+
+
+@contextmanager
+def action(name, **context):
+    """
+    Run a block of code as an action, profiling it if a profiling directory is set and it is not nested in another
+    action of the same thread
+
+    :param name: the action name
+    :type name: str
+    :param context: additional values stored in the record
+    :return: the record of the action
+    :rtype: ActionRecord
+    """
+    record = ActionRecord(name, **context)
+    outer = _active.get()
+    token = _active.set(outer + (record,))
+    profiler = cProfile.Profile() if settings['profile_dir'] and not outer else None
+    start = time.perf_counter()
+    try:
+        if profiler is not None:
+            profiler.enable()
+        yield record
+        record.status = 'ok'
+    except BaseException:
+        record.status = 'error'
+        raise
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        record.wall_seconds = time.perf_counter() - start
+        _active.reset(token)
+        emit(record, profiler)
+
+
+def instrumented(name=None):
+    """
+    Decorator running each call of a function as an action
+
+    :param name: the action name, the qualified name of the function by default
+    :type name: str
+    :return: the decorator
+    :rtype: callable
+    """
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with action(name or function.__qualname__):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def emit(record, profiler=None):
+    """
+    Log a record, append it to the metrics file and save the profile if any
+
+    :param record: the record
+    :type record: ActionRecord
+    :param profiler: the profiler of the action
+    :type profiler: cProfile.Profile
+    """
+    data = record.as_dict()
+    line = json.dumps(data, default=str)
+    logger.info(line)
+    if settings['metrics_file']:
+        with _write_lock, open(settings['metrics_file'], 'a', encoding='utf-8') as file:
+            file.write(line + '\n')
+    if profiler is not None:
+        os.makedirs(settings['profile_dir'], exist_ok=True)
+        profiler.dump_stats(os.path.join(settings['profile_dir'],
+                                         f'{record.name}-{int(record.start * 1000)}-{data["pid"]}.prof'))
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active.get():
+        conn.info.setdefault('instrumentation_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('instrumentation_start')
+    if _active.get() and starts:
+        add('db_query_seconds', time.perf_counter() - starts.pop())
+        add('db_queries')
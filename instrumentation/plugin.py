@@ -0,0 +1,67 @@
+"""
+The plugin class toggling the recording of action metrics and the profiling of actions
+"""
+import os
+
+from PySide6.QtGui import QAction
+
+from pydetecdiv import plugins
+from . import metrics
+
+
+class Plugin(plugins.Plugin):
+    """
+    A class extending plugins.Plugin to toggle the recording of metrics and the profiling of actions
+    """
+    id_ = 'gmgm.plewniak.instrumentation'
+    version = '1.0.0'
+    name = 'Instrumentation'
+    category = 'Tools'
+
+    def addActions(self, menu):
+        """
+        Overrides the addActions method in order to create a submenu with checkable actions toggling metrics recording
+        and profiling
+        :param menu: the parent menu
+        :type menu: QMenu
+        """
+        submenu = menu.addMenu(self.name)
+        action_metrics = QAction("Record action metrics", submenu, checkable=True)
+        action_metrics.setChecked(metrics.settings['metrics_file'] is not None)
+        action_metrics.toggled.connect(self.toggle_metrics)
+        submenu.addAction(action_metrics)
+
+        action_profile = QAction("Profile actions", submenu, checkable=True)
+        action_profile.setChecked(metrics.settings['profile_dir'] is not None)
+        action_profile.toggled.connect(self.toggle_profiling)
+        submenu.addAction(action_profile)
+
+    @staticmethod
+    def toggle_metrics(checked):
+        """
+        Start or stop appending action records to the metrics file, pydetecdiv_metrics.jsonl in the home directory
+        unless set by the PYDETECDIV_METRICS environment variable
+
+        :param checked: True to record metrics
+        :type checked: bool
+        """
+        default = os.environ.get('PYDETECDIV_METRICS') or os.path.join(os.path.expanduser('~'),
+                                                                        'pydetecdiv_metrics.jsonl')
+        metrics.settings['metrics_file'] = default if checked else None
+
+    @staticmethod
+    def toggle_profiling(checked):
+        """
+        Start or stop saving a cProfile profile of each action, in pydetecdiv_profiles in the home directory unless set
+        by the PYDETECDIV_PROFILE environment variable
+
+        :param checked: True to profile actions
+        :type checked: bool
+        """
+        default = os.environ.get('PYDETECDIV_PROFILE') or os.path.join(os.path.expanduser('~'), 'pydetecdiv_profiles')
+        metrics.settings['profile_dir'] = default if checked else None
+
+    def launch(self):
+        """
+        Nothing to launch, the plugin only provides toggles in its menu
+        """
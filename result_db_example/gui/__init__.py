@@ -2,10 +2,92 @@
 GUI for an example plugin showing how to create, populate and query a database table to store results generated by a
 plugin
 """
-from PySide6.QtCore import QStringListModel, Qt
+import logging
+
+from PySide6.QtCore import QAbstractListModel, QModelIndex, Qt, QThreadPool
 from PySide6.QtWidgets import QFrame, QFormLayout, QLabel, QComboBox, QListView, QDialogButtonBox, QDockWidget
 
 from pydetecdiv.utils import singleton
+from ..worker import Worker
+
+logger = logging.getLogger(__name__)
+
+
+class ResultsListModel(QAbstractListModel):
+    """
+    A list model fetching results page by page when the view needs them, so that the whole results table is never
+    loaded at once. Pages are requested from a fetcher function taking the id of the last fetched result (or None) and
+    the page size and returning a list of (id, text) tuples ordered by id. The fetcher is called in the global thread
+    pool, one page at a time, pages fetched for a previous fetcher are discarded and a failed fetch ends the list.
+    """
+
+    def __init__(self, page_size=200, parent=None):
+        super().__init__(parent)
+        self.page_size = page_size
+        self.rows = []
+        self.fetcher = None
+        self.exhausted = True
+        self.fetching = False
+        self.generation = 0
+
+    def set_fetcher(self, fetcher, rows=None):
+        """
+        Reset the model with a new fetcher function
+
+        :param fetcher: the function returning pages of (id, text) tuples, or None to empty the model
+        :type fetcher: callable
+        :param rows: the first page if it has already been fetched
+        :type rows: list of tuples
+        """
+        self.beginResetModel()
+        self.rows = list(rows) if rows is not None else []
+        self.fetcher = fetcher
+        self.exhausted = fetcher is None or (rows is not None and len(rows) < self.page_size)
+        self.fetching = False
+        self.generation += 1
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if index.isValid() and role == Qt.DisplayRole:
+            return self.rows[index.row()][1]
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.exhausted and not self.fetching
+
+    def fetchMore(self, parent=QModelIndex()):
+        if self.fetching or self.exhausted:
+            return
+        self.fetching = True
+        worker = Worker(self._fetch_page, self.fetcher, self.generation, self.rows[-1][0] if self.rows else None,
+                        self.page_size)
+        worker.signals.finished.connect(self._append_page)
+        QThreadPool.globalInstance().start(worker)
+
+    @staticmethod
+    def _fetch_page(fetcher, generation, after_id, page_size):
+        try:
+            return generation, fetcher(after_id, page_size)
+        except Exception:
+            logger.exception('Fetching results failed')
+            return generation, None
+
+    def _append_page(self, result):
+        generation, page = result
+        if generation != self.generation:
+            return
+        self.fetching = False
+        if page is None:
+            self.exhausted = True
+            return
+        self.exhausted = len(page) < self.page_size
+        if page:
+            self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(page) - 1)
+            self.rows.extend(page)
+            self.endInsertRows()
 
 
 @singleton
@@ -30,7 +112,7 @@ class DockWindow(QDockWidget):
         self.formLayout.addRow(self.position_label, self.position_choice)
 
         self.list_view = QListView(self.form)
-        self.list_model = QStringListModel()
+        self.list_model = ResultsListModel()
         self.list_view.setModel(self.list_model)
 
         self.formLayout.addRow(self.list_view)
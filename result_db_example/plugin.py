@@ -0,0 +1,170 @@
+"""
+The example plugin class, saving and listing results in the project database
+"""
+from functools import partial
+
+from pydetecdiv import plugins
+from pydetecdiv.app import PyDetecDiv, pydetecdiv_project
+from instrumentation.metrics import instrumented
+from . import results_store
+from .gui import DockWindow
+from .worker import BackgroundRefresh, BackgroundTask
+
+
+class Plugin(plugins.Plugin):
+    """
+    A class extending plugins.Plugin to handle the example plugin
+    """
+    id_ = 'gmgm.plewniak.example'
+    version = '1.0.0'
+    name = 'Results in DB example'
+    category = 'Demo plugins'
+
+    def create_table(self):
+        """
+        Create the table to save results if it does not exist yet
+        """
+        with pydetecdiv_project(PyDetecDiv().project_name) as project:
+            results_store.create_schema(project.repository.engine)
+
+    def launch(self):
+        """
+        Method launching the plugin. This may encapsulate (as it is the case here) the call to a GUI or some domain
+        functionalities run directly without any further interface.
+        """
+        self.show_gui()
+
+    def show_gui(self):
+        """
+        Show the docked window containing the GUI for the example plugin, creating it if it does not exist.
+        """
+        if self.gui is None:
+            self.gui = DockWindow(PyDetecDiv().main_window)
+            self.gui.button_box.accepted.connect(self.save_result)
+            self.results_refresh = BackgroundRefresh(self.load_saved_results, self.update_saved_results,
+                                                     parent=self.gui)
+            self.choice_refresh = BackgroundRefresh(self.load_choice, self.update_choice, parent=self.gui)
+            self.saving = BackgroundTask(self.store_result, self.show_saved_results, parent=self.gui)
+            PyDetecDiv().project_selected.connect(self.show_saved_results)
+            PyDetecDiv().saved_rois.connect(self.show_saved_results)
+            self.set_choice(PyDetecDiv().project_name)
+            PyDetecDiv().project_selected.connect(self.set_choice)
+        self.gui.setVisible(True)
+
+    def save_result(self):
+        """
+        Save results in database in the background, creating the necessary table if it does not exist, then refresh the
+        list of results. Here, results are simply the name and id_ of the selected FOV
+        """
+        self.saving.start(PyDetecDiv().project_name, self.gui.position_choice.currentText())
+
+    @staticmethod
+    @instrumented('result_db_example.save_result')
+    def store_result(project_name, fov_name):
+        """
+        Save the result for a FOV. This is run in a worker thread.
+
+        :param project_name: the project name
+        :type project_name: str
+        :param fov_name: the FOV name
+        :type fov_name: str
+        :return: the project name
+        :rtype: str
+        """
+        with pydetecdiv_project(project_name) as project:
+            fov = project.get_named_object("FOV", fov_name)
+            results_store.insert(project, [{'name': fov.name, 'fov': fov.id_}])
+        return project_name
+
+    def show_saved_results(self, project_name):
+        """
+        Shows the list of results in the ListView of the GUI. The first page of results is loaded in the background and
+        bursts of requests are coalesced into a single query. The list model then fetches the next pages as they are
+        displayed.
+
+        :param project_name: the project name
+        :type project_name: str
+        """
+        self.results_refresh.request(project_name)
+
+    @instrumented('result_db_example.load_saved_results')
+    def load_saved_results(self, project_name):
+        """
+        Load the first page of results of a project. This is run in a worker thread.
+
+        :param project_name: the project name
+        :type project_name: str
+        :return: the project name and the first page of results, or None if there is no project
+        :rtype: tuple(str, list) or None
+        """
+        if project_name:
+            return project_name, self.fetch_results(project_name, None, self.gui.list_model.page_size)
+        return None
+
+    def update_saved_results(self, results):
+        """
+        Reset the list model with the first page of results loaded by load_saved_results()
+
+        :param results: the project name and the first page of results, or None
+        :type results: tuple(str, list) or None
+        """
+        if results is None:
+            self.gui.list_model.set_fetcher(None)
+        else:
+            project_name, rows = results
+            self.gui.list_model.set_fetcher(partial(self.fetch_results, project_name), rows)
+
+    @staticmethod
+    @instrumented('result_db_example.fetch_results')
+    def fetch_results(project_name, after_id, limit):
+        """
+        Fetch a page of results formatted for display
+
+        :param project_name: the project name
+        :type project_name: str
+        :param after_id: the id of the last result of the previous page, or None for the first page
+        :type after_id: int
+        :param limit: the number of results in a page
+        :type limit: int
+        :return: the (result id, text) tuples
+        :rtype: list of tuples
+        """
+        with pydetecdiv_project(project_name) as project:
+            return [(r, f'{r}: {fov_name} ({n_rois} ROIs)') for r, fov_name, n_rois in
+                    results_store.list_with_roi_counts(project, after_id=after_id, limit=limit)]
+
+    def set_choice(self, p_name):
+        """
+        Set the available values for FOVs, datasets and channels given a project name. FOV names are loaded in the
+        background.
+
+        :param p_name: the project name
+        :type p_name: str
+        """
+        self.choice_refresh.request(p_name)
+
+    @staticmethod
+    @instrumented('result_db_example.load_choice')
+    def load_choice(p_name):
+        """
+        Load the sorted FOV names of a project. This is run in a worker thread.
+
+        :param p_name: the project name
+        :type p_name: str
+        :return: the FOV names
+        :rtype: list of str
+        """
+        if not p_name:
+            return []
+        with pydetecdiv_project(p_name) as project:
+            return results_store.fov_names(project)
+
+    def update_choice(self, fov_names):
+        """
+        Replace the available FOVs with those loaded by load_choice()
+
+        :param fov_names: the FOV names
+        :type fov_names: list of str
+        """
+        self.gui.position_choice.clear()
+        self.gui.position_choice.addItems(fov_names)
@@ -0,0 +1,110 @@
+"""
+A results store handling the table in which a plugin saves its results: schema creation, bulk insertion and listing
+with the related FOV information
+"""
+import sqlalchemy
+from sqlalchemy import column, func, insert, select, table
+
+#: Lightweight descriptions of the project tables queried along with results
+fov_table = table('FOV', column('id_'), column('name'))
+roi_table = table('ROI', column('id_'), column('fov'))
+
+
+class ResultsStore:
+    """
+    Store for results saved in a table defined by a DAO class with a fov column referring to the FOV table. The table
+    is created once per database and rows are inserted in bulk.
+    """
+
+    def __init__(self, dao):
+        self.dao = dao
+        self._databases = set()
+
+    @property
+    def table(self):
+        """
+        The results table
+        """
+        return self.dao.__table__
+
+    def create_schema(self, engine):
+        """
+        Create the results table if it does not exist yet. This is done only once per database
+
+        :param engine: the engine of the project database
+        :type engine: sqlalchemy.engine.Engine
+        """
+        if str(engine.url) not in self._databases:
+            self.dao.metadata.create_all(engine)
+            self._databases.add(str(engine.url))
+
+    def has_table(self, engine):
+        """
+        Check whether the results table exists in the project database
+
+        :param engine: the engine of the project database
+        :type engine: sqlalchemy.engine.Engine
+        :return: True if the table exists, False otherwise
+        :rtype: bool
+        """
+        if str(engine.url) in self._databases:
+            return True
+        if sqlalchemy.inspect(engine).has_table(self.table.name):
+            self._databases.add(str(engine.url))
+            return True
+        return False
+
+    def insert(self, project, rows):
+        """
+        Insert result rows in a single transaction with one executemany statement
+
+        :param project: the project
+        :type project: Project
+        :param rows: the results as dictionaries mapping column names to values
+        :type rows: list of dict
+        """
+        self.create_schema(project.repository.engine)
+        if rows:
+            project.repository.session.execute(insert(self.table), rows)
+            project.commit()
+
+    def list_with_roi_counts(self, project, after_id=None, limit=None):
+        """
+        List results with the name of their FOV and the number of ROIs in that FOV, using a single query. ROIs are
+        counted by a correlated subquery for the listed results only, so that listing a page does not join and group
+        all ROIs. Results may be fetched page by page with keyset pagination, passing the id of the last result of the
+        previous page as after_id
+
+        :param project: the project
+        :type project: Project
+        :param after_id: only list results whose id is greater than after_id
+        :type after_id: int
+        :param limit: the maximum number of results to list
+        :type limit: int
+        :return: (result id, FOV name, number of ROIs) rows ordered by result id
+        :rtype: list of tuples
+        """
+        if not self.has_table(project.repository.engine):
+            return []
+        n_rois = (select(func.count()).select_from(roi_table).where(roi_table.c.fov == self.table.c.fov)
+                  .scalar_subquery())
+        query = (select(self.table.c.id_, fov_table.c.name, n_rois)
+                 .outerjoin(fov_table, self.table.c.fov == fov_table.c.id_)
+                 .order_by(self.table.c.id_))
+        if after_id is not None:
+            query = query.where(self.table.c.id_ > after_id)
+        if limit is not None:
+            query = query.limit(limit)
+        return project.repository.session.execute(query).all()
+
+    @staticmethod
+    def fov_names(project):
+        """
+        Get the names of all FOVs in the project, sorted alphabetically, without loading FOV objects
+
+        :param project: the project
+        :type project: Project
+        :return: the FOV names
+        :rtype: list of str
+        """
+        return list(project.repository.session.execute(select(fov_table.c.name).order_by(fov_table.c.name)).scalars())
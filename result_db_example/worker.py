@@ -0,0 +1,126 @@
+"""
+Background execution of the database queries run by the GUI: refreshes, saves and list pages, so that they do not
+block the GUI thread
+"""
+import logging
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QTimer, Signal
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerSignals(QObject):
+    """
+    The signals emitted by a Worker, as QRunnable is not a QObject and cannot emit signals itself
+    """
+    finished = Signal(object)
+    error = Signal(str)
+
+
+class Worker(QRunnable):
+    """
+    A runnable calling a function in a thread of the pool and emitting its result
+    """
+
+    def __init__(self, function, *args):
+        super().__init__()
+        self.function = function
+        self.args = args
+        self.signals = WorkerSignals()
+
+    def run(self):
+        """
+        Call the function and emit the finished signal with its result, or the error signal if it raised an exception
+        """
+        try:
+            result = self.function(*self.args)
+        except Exception as e:
+            self.signals.error.emit(str(e))
+        else:
+            self.signals.finished.emit(result)
+
+
+class BackgroundRefresh(QObject):
+    """
+    Runs a function in the global thread pool when a refresh is requested and passes its result to a callback in the
+    GUI thread. Requests arriving within delay milliseconds of each other are coalesced into one call with the
+    arguments of the last request, and requests arriving while the function is running trigger a single new call once
+    it has finished.
+    """
+
+    def __init__(self, function, callback, delay=200, parent=None):
+        super().__init__(parent)
+        self.function = function
+        self.callback = callback
+        self.args = ()
+        self.running = False
+        self.pending = False
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay)
+        self.timer.timeout.connect(self._start)
+
+    def request(self, *args):
+        """
+        Request a refresh, postponing the call until no other request has been made for the debounce delay
+
+        :param args: the arguments passed to the function
+        """
+        self.args = args
+        self.timer.start()
+
+    def _start(self):
+        if self.running:
+            self.pending = True
+            return
+        self.running = True
+        worker = Worker(self.function, *self.args)
+        worker.signals.finished.connect(self._finished)
+        worker.signals.error.connect(self._failed)
+        QThreadPool.globalInstance().start(worker)
+
+    def _finished(self, result):
+        self.running = False
+        self.callback(result)
+        self._restart_pending()
+
+    def _failed(self, message):
+        self.running = False
+        logger.error('Background refresh failed: %s', message)
+        self._restart_pending()
+
+    def _restart_pending(self):
+        if self.pending:
+            self.pending = False
+            self._start()
+
+
+class BackgroundTask(QObject):
+    """
+    Runs a function in a thread of its own pool each time it is started and passes its result to a callback in the GUI
+    thread. Unlike BackgroundRefresh, no call is dropped: calls are run one at a time in the order they were started.
+    """
+
+    def __init__(self, function, callback, parent=None):
+        super().__init__(parent)
+        self.function = function
+        self.callback = callback
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+
+    def start(self, *args):
+        """
+        Queue a call of the function
+
+        :param args: the arguments passed to the function
+        """
+        worker = Worker(self.function, *args)
+        worker.signals.finished.connect(self._finished)
+        worker.signals.error.connect(self._failed)
+        self.pool.start(worker)
+
+    def _finished(self, result):
+        self.callback(result)
+
+    def _failed(self, message):
+        logger.error('Background task failed: %s', message)
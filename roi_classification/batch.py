@@ -0,0 +1,75 @@
+"""
+Batched extraction of ROI images for a whole set of ROIs and frames into a single preallocated array
+"""
+import numpy as np
+
+from .cache import get_fov_crops
+
+
+def extract_roi_batch(parent_plugin, fov_rois, roi_list, frames, cache, image_data=None, progress=None):
+    """
+    Extract the images of all ROIs at all requested frames into one array of shape (n_roi, n_frames, H, W, C). H and W
+    are the largest ROI height and width, smaller ROIs are zero-padded at the bottom and right. The crops of the ROIs
+    of a FOV are written at once into the rows of these ROIs, with one slice assignment per FOV and frame.
+
+    The crops themselves are those returned by the parent plugin's get_rgb_images_from_stacks(), that defines how
+    channels are selected and combined into RGB images, and they are only stacked when a FOV frame is decoded.
+
+    :param parent_plugin: the ROI classification plugin providing get_rgb_images_from_stacks()
+    :type parent_plugin: plugins.Plugin
+    :param fov_rois: the ROIs grouped by FOV, as returned by group_rois_by_fov()
+    :type fov_rois: dict
+    :param roi_list: the ROIs in the order of the first axis of the returned array
+    :type roi_list: list of ROI objects
+    :param frames: the frames in the order of the second axis of the returned array
+    :type frames: list of int or range
+    :param cache: the frame cache
+    :type cache: FrameCache
+    :param image_data: already opened image resource data keyed by FOV id
+    :type image_data: dict
+    :param progress: a callable taking the number of frames extracted and the total number of frames, called after
+     each frame
+    :type progress: callable
+    :return: the ROI images, an empty float32 array of shape (n_roi, n_frames, 0, 0, 1) if there are no ROIs or frames
+    :rtype: ndarray
+    """
+    if image_data is None:
+        image_data = {}
+    position = {roi.id_: i for i, roi in enumerate(roi_list)}
+    fov_rois = {fov_id: (fov, [roi for roi in rois if roi.id_ in position])
+                for fov_id, (fov, rois) in fov_rois.items()}
+    fov_rois = {fov_id: entry for fov_id, entry in fov_rois.items() if entry[1]}
+    rows = {fov_id: np.array([position[roi.id_] for roi in rois]) for fov_id, (_, rois) in fov_rois.items()}
+    if not fov_rois:
+        return _allocate_batch([], len(roi_list), len(frames))
+    batch = None
+    for j, t in enumerate(frames):
+        crops = get_fov_crops(parent_plugin, fov_rois, t, cache, image_data)
+        if batch is None:
+            batch = _allocate_batch(list(crops.values()), len(roi_list), len(frames))
+        for fov_id, stacked in crops.items():
+            batch[rows[fov_id], j, :stacked.shape[1], :stacked.shape[2], :] = stacked
+        if progress is not None:
+            progress(j + 1, len(frames))
+    if batch is None:
+        batch = _allocate_batch([], len(roi_list), 0)
+    return batch
+
+
+def _allocate_batch(stacks, n_roi, n_frames):
+    """
+    Allocate the array to hold ROI images given the stacked crops of the first frame
+
+    :param stacks: the stacked ROI crops of each FOV
+    :type stacks: list of ndarray
+    :param n_roi: the number of ROIs
+    :type n_roi: int
+    :param n_frames: the number of frames
+    :type n_frames: int
+    :return: a zero-filled array of shape (n_roi, n_frames, H, W, C)
+    :rtype: ndarray
+    """
+    if not stacks:
+        return np.zeros((n_roi, n_frames, 0, 0, 1), dtype=np.float32)
+    shape = tuple(max(stack.shape[k] for stack in stacks) for k in range(1, 4))
+    return np.zeros((n_roi, n_frames) + shape, dtype=np.result_type(*stacks))
@@ -0,0 +1,154 @@
+"""
+Caching of ROI images extracted from FOV image resources, so that a FOV frame is read and decoded only once whatever the
+number of ROIs it contains. The crops of the ROIs of a FOV at a frame are kept stacked in a single array, so that they
+are copied at once wherever they are needed.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from instrumentation.metrics import add
+
+
+class FrameCache:
+    """
+    A least recently used cache of ROI crops keyed by (FOV id, frame, ROI ids). Each entry holds the stacked crops of
+    the requested ROIs of one FOV at one frame. The cache is bounded by the total number of bytes of the cached crops.
+    It is thread safe, so that it can be cleared from the GUI thread while a background job fills it.
+    """
+
+    def __init__(self, max_bytes=512 * 1024 ** 2):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key):
+        """
+        Get the ROI crops cached for a FOV and frame, marking them as recently used
+
+        :param key: the (FOV id, frame, ROI ids) key
+        :type key: tuple
+        :return: the stacked ROI crops, or None if the key is not in the cache
+        :rtype: ndarray or None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, crops):
+        """
+        Add ROI crops for a FOV and frame to the cache, evicting the least recently used entries if the cache size
+        exceeds its byte limit. An entry that is larger than the limit by itself is not cached.
+
+        :param key: the (FOV id, frame, ROI ids) key
+        :type key: tuple
+        :param crops: the stacked ROI crops
+        :type crops: ndarray
+        """
+        size = crops.nbytes
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._entries.pop(key).nbytes
+            if size > self.max_bytes:
+                return
+            self._entries[key] = crops
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+
+    def clear(self):
+        """
+        Empty the cache
+        """
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+
+def group_rois_by_fov(project, roi_list):
+    """
+    Group ROIs according to the FOV they belong to, resolving each FOV only once
+
+    :param project: the current project
+    :type project: Project
+    :param roi_list: the list of ROIs
+    :type roi_list: list of ROI objects
+    :return: a dictionary associating FOV ids to (FOV, list of ROIs) tuples
+    :rtype: dict
+    """
+    fov_rois = {}
+    for roi in roi_list:
+        fov = project.get_linked_objects('FOV', roi)[0]
+        fov_rois.setdefault(fov.id_, (fov, []))[1].append(roi)
+    return fov_rois
+
+
+def stack_crops(crops):
+    """
+    Stack ROI crops into one (n_roi, H, W, C) array, H, W and C being the largest height, width and number of channels.
+    Smaller crops are zero-padded at the bottom and right, 2D crops are single-channel.
+
+    :param crops: the ROI crops, of shape (h, w) or (h, w, c)
+    :type crops: list of ndarray
+    :return: the stacked crops
+    :rtype: ndarray
+    """
+    crops = [crop.reshape(crop.shape[0], crop.shape[1], -1) for crop in map(np.asarray, crops)]
+    if not crops:
+        return np.zeros((0, 0, 0, 1), dtype=np.float32)
+    if len({crop.shape for crop in crops}) == 1:
+        return np.stack(crops)
+    stacked = np.zeros((len(crops),) + tuple(max(crop.shape[k] for crop in crops) for k in range(3)),
+                       dtype=np.result_type(*crops))
+    for k, crop in enumerate(crops):
+        stacked[k, :crop.shape[0], :crop.shape[1], :] = crop
+    return stacked
+
+
+def get_fov_crops(parent_plugin, fov_rois, t, cache, image_data=None):
+    """
+    Get the crops of all ROIs at frame t, stacked FOV by FOV. The crops of ROIs sharing a FOV are extracted from a
+    single decoded frame with one call to get_rgb_images_from_stacks(), stacked once into one array in the order of the
+    ROIs of the FOV, and kept in the cache for further calls.
+
+    :param parent_plugin: the ROI classification plugin providing get_rgb_images_from_stacks()
+    :type parent_plugin: plugins.Plugin
+    :param fov_rois: the ROIs grouped by FOV, as returned by group_rois_by_fov()
+    :type fov_rois: dict
+    :param t: the frame
+    :type t: int
+    :param cache: the frame cache
+    :type cache: FrameCache
+    :param image_data: a dictionary of already opened image resource data keyed by FOV id, that is updated with newly
+     opened resources
+    :type image_data: dict
+    :return: the stacked crops of shape (n_roi, H, W, C) keyed by FOV id, see stack_crops()
+    :rtype: dict
+    """
+    if image_data is None:
+        image_data = {}
+    crops = {}
+    for fov_id, (fov, rois) in fov_rois.items():
+        key = (fov_id, t, tuple(roi.id_ for roi in rois))
+        cached = cache.get(key)
+        if cached is None:
+            if fov_id not in image_data:
+                image_data[fov_id] = fov.image_resource().image_resource_data()
+            cached = stack_crops(parent_plugin.get_rgb_images_from_stacks(image_data[fov_id], rois, t))
+            add('image_bytes_read', cached.nbytes)
+            cache.put(key, cached)
+        crops[fov_id] = cached
+    return crops
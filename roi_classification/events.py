@@ -0,0 +1,145 @@
+"""
+Label tracks and class transition events: the predicted class of all ROIs at all frames is derived at once from the
+predictions, and run-length encoded into class segments and transitions per ROI. Transitions are bucketed by
+(previous class, next class) so that events such as divisions or deaths are queried in time proportional to their
+number rather than to the size of the predictions.
+"""
+import numpy as np
+
+
+def label_track(predictions, chunk_size=64):
+    """
+    Get the predicted class of all ROIs at all frames, processing predictions chunk by chunk of ROIs so that memory
+    mapped predictions are not loaded at once
+
+    :param predictions: the predictions of shape (n_roi, n_frames, n_classes)
+    :type predictions: ndarray
+    :param chunk_size: the number of ROIs processed at once
+    :type chunk_size: int
+    :return: the class indices, of shape (n_roi, n_frames)
+    :rtype: ndarray
+    """
+    labels = np.empty(predictions.shape[:2], dtype=np.int16)
+    for start in range(0, predictions.shape[0], chunk_size):
+        labels[start:start + chunk_size] = np.argmax(predictions[start:start + chunk_size], axis=-1)
+    return labels
+
+
+class EventIndex:
+    """
+    Run-length index of a label track. Segments are the maximal runs of frames with the same class in a ROI, sorted by
+    ROI and start frame. Transitions are the starts of segments other than the first one of each ROI.
+
+    :ivar segment_roi: the ROI index of each segment
+    :ivar segment_start: the first frame of each segment
+    :ivar segment_length: the number of frames of each segment
+    :ivar segment_label: the class of each segment
+    :ivar transition_roi: the ROI index of each transition
+    :ivar transition_frame: the first frame in the new class of each transition
+    :ivar transition_from: the class before each transition
+    :ivar transition_to: the class after each transition
+    """
+
+    def __init__(self, labels, t=0):
+        n_roi, n_frames = labels.shape
+        change = np.ones(labels.shape, dtype=bool)
+        change[:, 1:] = labels[:, 1:] != labels[:, :-1]
+        self.segment_roi, start = np.nonzero(change)
+        ends = np.append(start[1:], n_frames)
+        ends[np.append(self.segment_roi[1:] != self.segment_roi[:-1], True)] = n_frames
+        self.segment_start = start + t
+        self.segment_length = ends - start
+        self.segment_label = labels[self.segment_roi, start]
+        self.n_roi = n_roi
+
+        following = np.flatnonzero(start > 0)
+        self.transition_roi = self.segment_roi[following]
+        self.transition_frame = self.segment_start[following]
+        self.transition_from = self.segment_label[following - 1]
+        self.transition_to = self.segment_label[following]
+
+        keys = np.stack([self.transition_from, self.transition_to], axis=-1)
+        order = np.lexsort((self.transition_to, self.transition_from))
+        bounds = np.flatnonzero(np.any(np.diff(keys[order], axis=0), axis=-1)) + 1
+        self._buckets = {tuple(int(k) for k in keys[group[0]]): group
+                         for group in np.split(order, bounds) if len(group)}
+
+    @classmethod
+    def from_predictions(cls, predictions, t=0, chunk_size=64):
+        """
+        Build the index of predictions
+
+        :param predictions: the predictions of shape (n_roi, n_frames, n_classes)
+        :type predictions: ndarray
+        :param t: the frame of the first prediction along the second axis
+        :type t: int
+        :param chunk_size: the number of ROIs processed at once when computing the label track
+        :type chunk_size: int
+        :return: the index
+        :rtype: EventIndex
+        """
+        return cls(label_track(predictions, chunk_size=chunk_size), t=t)
+
+    def _select(self, from_label=None, to_label=None):
+        """
+        Get the indices of transitions from a class to another, any class matching None, sorted by ROI and frame
+        """
+        groups = [group for (previous, following), group in self._buckets.items()
+                  if from_label in (None, previous) and to_label in (None, following)]
+        if not groups:
+            return np.empty((0,), dtype=np.intp)
+        return np.sort(np.concatenate(groups)) if len(groups) > 1 else groups[0]
+
+    def transitions(self, from_label=None, to_label=None):
+        """
+        Get the transitions from a class to another, e.g. from large to small for divisions or from any class to dead
+        for deaths
+
+        :param from_label: the class before the transition, None for any class
+        :type from_label: int
+        :param to_label: the class after the transition, None for any class
+        :type to_label: int
+        :return: the ROI indices and the frames of the transitions
+        :rtype: tuple(ndarray, ndarray)
+        """
+        selection = self._select(from_label, to_label)
+        return self.transition_roi[selection], self.transition_frame[selection]
+
+    def count(self, from_label=None, to_label=None):
+        """
+        Count the transitions from a class to another
+
+        :param from_label: the class before the transition, None for any class
+        :type from_label: int
+        :param to_label: the class after the transition, None for any class
+        :type to_label: int
+        :return: the number of transitions
+        :rtype: int
+        """
+        return sum(len(group) for (previous, following), group in self._buckets.items()
+                   if from_label in (None, previous) and to_label in (None, following))
+
+    def count_per_roi(self, from_label=None, to_label=None):
+        """
+        Count the transitions from a class to another in each ROI
+
+        :param from_label: the class before the transition, None for any class
+        :type from_label: int
+        :param to_label: the class after the transition, None for any class
+        :type to_label: int
+        :return: the number of transitions of each ROI
+        :rtype: ndarray
+        """
+        return np.bincount(self.transition_roi[self._select(from_label, to_label)], minlength=self.n_roi)
+
+    def segments(self, roi):
+        """
+        Get the class segments of a ROI, e.g. small, large, then dead
+
+        :param roi: the ROI index
+        :type roi: int
+        :return: the first frame, the number of frames and the class of each segment
+        :rtype: tuple(ndarray, ndarray, ndarray)
+        """
+        first, last = np.searchsorted(self.segment_roi, [roi, roi + 1])
+        return self.segment_start[first:last], self.segment_length[first:last], self.segment_label[first:last]
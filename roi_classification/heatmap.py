@@ -0,0 +1,116 @@
+"""
+Composition of prediction heatmaps for many ROIs and long time series into a single image
+"""
+import numpy as np
+
+
+def downsample_time(scores, max_columns, method='max'):
+    """
+    Downsample predictions along time so that there are at most max_columns time points. Consecutive frames are
+    grouped in bins that are reduced to their maximum or minimum score, or to the scores of the class with the best
+    mean score over the bin (argmax)
+
+    :param scores: the predictions of shape (n_roi, n_frames, n_classes)
+    :type scores: ndarray
+    :param max_columns: the maximum number of time points
+    :type max_columns: int
+    :param method: the reduction method, one of 'max', 'min' or 'argmax'
+    :type method: str
+    :return: the downsampled predictions and the number of frames per bin
+    :rtype: tuple(ndarray, int)
+    """
+    n_frames = scores.shape[1]
+    if n_frames <= max_columns:
+        return scores, 1
+    factor = -(-n_frames // max_columns)
+    starts = np.arange(0, n_frames, factor)
+    if method == 'max':
+        return np.maximum.reduceat(scores, starts, axis=1), factor
+    if method == 'min':
+        return np.minimum.reduceat(scores, starts, axis=1), factor
+    if method == 'argmax':
+        means = np.add.reduceat(scores, starts, axis=1, dtype=np.float32)
+        best = np.argmax(means, axis=-1)
+        return np.eye(scores.shape[-1], dtype=scores.dtype)[best], factor
+    raise ValueError(f'Unknown downsampling method: {method}')
+
+
+def compose_heatmap(scores, mode='scores'):
+    """
+    Compose the predictions of all ROIs into one image. In 'scores' mode, each ROI is represented by one row per class
+    showing the score of that class; in 'argmax' mode, each ROI is a single row showing the index of the best class.
+
+    :param scores: the predictions of shape (n_roi, n_frames, n_classes)
+    :type scores: ndarray
+    :param mode: the heatmap mode, 'scores' or 'argmax'
+    :type mode: str
+    :return: the heatmap image, of shape (n_roi * n_classes, n_frames) or (n_roi, n_frames)
+    :rtype: ndarray
+    """
+    if mode == 'scores':
+        return np.moveaxis(scores, -1, 1).reshape(-1, scores.shape[1])
+    if mode == 'argmax':
+        return np.argmax(scores, axis=-1)
+    raise ValueError(f'Unknown heatmap mode: {mode}')
+
+
+def page_slice(page, rows_per_page, n_rows):
+    """
+    Get the slice of ROI rows in a page, clipping the page number to the available pages
+
+    :param page: the page number, starting at 0
+    :type page: int
+    :param rows_per_page: the number of ROI rows per page
+    :type rows_per_page: int
+    :param n_rows: the total number of ROI rows
+    :type n_rows: int
+    :return: the slice of rows and the number of pages
+    :rtype: tuple(slice, int)
+    """
+    n_pages = max(1, -(-n_rows // rows_per_page))
+    page = min(max(page, 0), n_pages - 1)
+    return slice(page * rows_per_page, min((page + 1) * rows_per_page, n_rows)), n_pages
+
+
+def draw_heatmap(ax, predictions, roi_names, class_names, t=0, mode='scores', max_columns=2000, downsampling='max'):
+    """
+    Draw the predictions of ROIs as a single heatmap image, with a colour bar and ROI names as tick labels. Long time
+    series are downsampled to at most max_columns time points so that only the visible rows and columns are
+    rasterized.
+
+    :param ax: the axes
+    :type ax: matplotlib.axes.Axes
+    :param predictions: the predictions of shape (n_roi, n_frames, n_classes)
+    :type predictions: ndarray
+    :param roi_names: the ROI names
+    :type roi_names: list of str
+    :param class_names: the class names
+    :type class_names: list of str
+    :param t: the frame of the first prediction
+    :type t: int
+    :param mode: 'scores' to show the score of each class, 'argmax' to show the best class only
+    :type mode: str
+    :param max_columns: the maximum number of time points
+    :type max_columns: int
+    :param downsampling: the downsampling method along time, 'max', 'min' or 'argmax'
+    :type downsampling: str
+    """
+    n_frames = predictions.shape[1]
+    scores, factor = downsample_time(predictions, max_columns, downsampling)
+    heatmap = compose_heatmap(scores, mode=mode)
+    extent = (t - 0.5, t + n_frames - 0.5, heatmap.shape[0] - 0.5, -0.5)
+    rows_per_roi = len(class_names) if mode == 'scores' else 1
+    if mode == 'scores':
+        image = ax.imshow(heatmap, aspect='auto', interpolation='nearest', extent=extent)
+        ax.hlines(np.arange(1, len(roi_names)) * rows_per_roi - 0.5, t - 0.5, t + n_frames - 0.5,
+                  colors='white', linewidth=0.5)
+        ax.figure.colorbar(image, ax=ax)
+    else:
+        image = ax.imshow(heatmap, aspect='auto', interpolation='nearest', cmap='tab10',
+                          vmin=-0.5, vmax=len(class_names) - 0.5, extent=extent)
+        colorbar = ax.figure.colorbar(image, ax=ax, ticks=np.arange(len(class_names)))
+        colorbar.ax.set_yticklabels(class_names, fontsize='xx-small')
+    ax.set_yticks(np.arange(len(roi_names)) * rows_per_roi + (rows_per_roi - 1) / 2, labels=roi_names,
+                  fontsize='xx-small')
+    if factor > 1:
+        ax.set_xlabel(f'frame ({downsampling} over {factor} frames)', fontsize='xx-small')
@@ -0,0 +1,198 @@
+"""
+Streaming batched inference over image files: images are read and prepared by a pool of threads ahead of the model,
+resized batch-wise and classified with one predict call per batch. Loaded models are kept in a cache so that they can be
+reused by subsequent inferences.
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
+
+import numpy as np
+
+from instrumentation.metrics import add, timed
+
+
+def configure_threads(n_threads=None):
+    """
+    Set the number of CPU threads TensorFlow may use for inference. This must be done before TensorFlow executes any
+    operation, otherwise the current settings are kept.
+
+    :param n_threads: the number of threads, defaults to the number of CPUs
+    :type n_threads: int
+    """
+    import tensorflow as tf
+    n_threads = n_threads or os.cpu_count()
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(n_threads)
+        tf.config.threading.set_inter_op_parallelism_threads(n_threads)
+    except RuntimeError:
+        pass
+
+
+def read_image(path):
+    """
+    Read an image file and convert it to the tensor fed to the model
+
+    :param path: the image file path
+    :type path: str
+    :return: the image tensor
+    :rtype: Tensor
+    """
+    import tifffile
+    from pydetecdiv.domain.Image import Image
+    return Image(tifffile.imread(path)).as_tensor()
+
+
+def iter_batches(paths, batch_size=32, reader=read_image, workers=None, prefetch=2):
+    """
+    Generator yielding batches of images read concurrently. At most prefetch batches are read ahead of the consumer.
+
+    :param paths: the image file paths
+    :type paths: list of str
+    :param batch_size: the number of images in a batch
+    :type batch_size: int
+    :param reader: the function reading one image from its path
+    :type reader: callable
+    :param workers: the number of reading threads, defaults to the number of CPUs
+    :type workers: int
+    :param prefetch: the number of batches read ahead
+    :type prefetch: int
+    :return: lists of images
+    :rtype: generator
+    """
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        pending = deque()
+        for path in paths:
+            pending.append(executor.submit(reader, path))
+            if len(pending) >= batch_size * (prefetch + 1):
+                yield [pending.popleft().result() for _ in range(batch_size)]
+        while pending:
+            yield [pending.popleft().result() for _ in range(min(batch_size, len(pending)))]
+
+
+def resize_batch(images, size=(224, 224), method='nearest'):
+    """
+    Resize a list of images into one batch tensor of shape (n, 1, height, width, channels) suitable for the sequence
+    models. Images with identical shapes are resized with one vectorized call.
+
+    :param images: the images
+    :type images: list of Tensor
+    :param size: the target (height, width)
+    :type size: tuple of int
+    :param method: the resize method
+    :type method: str
+    :return: the batch
+    :rtype: Tensor
+    """
+    import tensorflow as tf
+    if all(img.shape == images[0].shape for img in images):
+        batch = tf.image.resize(tf.stack(images, axis=0), size, method=method)
+    else:
+        batch = tf.stack([tf.image.resize(img, size, method=method) for img in images], axis=0)
+    return tf.expand_dims(batch, 1)
+
+
+def predict_files(model, paths, batch_size=32, size=(224, 224), workers=None, progress=None, return_images=False):
+    """
+    Classify image files with a model returning (data, predictions) where predictions have shape
+    (batch, sequence, classes)
+
+    :param model: the model
+    :type model: keras.Model
+    :param paths: the image file paths
+    :type paths: list of str
+    :param batch_size: the number of images predicted at once
+    :type batch_size: int
+    :param size: the input (height, width) of the model
+    :type size: tuple of int
+    :param workers: the number of reading threads
+    :type workers: int
+    :param progress: a callable taking the number of images classified and the total number of images, called after
+     each batch
+    :type progress: callable
+    :param return_images: True to also return the images as read, before resizing, so that they need not be read again
+    :type return_images: bool
+    :return: the index of the best class and the score vector of each image, and the images if return_images is True
+    :rtype: tuple(ndarray, ndarray) or tuple(ndarray, ndarray, list)
+    """
+    scores = None
+    start = 0
+    decoded = []
+    for images in iter_batches(paths, batch_size=batch_size, workers=workers):
+        if return_images:
+            decoded.extend(images)
+        add('image_bytes_read', sum(int(np.prod(image.shape)) * image.dtype.size for image in images))
+        with timed('predict'):
+            _, predictions = model.predict_on_batch(resize_batch(images, size=size))
+        predictions = np.asarray(predictions)[:, 0, ...]
+        if scores is None:
+            scores = np.empty((len(paths), predictions.shape[-1]), dtype=predictions.dtype)
+        scores[start:start + len(images)] = predictions
+        start += len(images)
+        if progress is not None:
+            progress(start, len(paths))
+    if scores is None:
+        scores = np.empty((0, 0), dtype=np.float32)
+    labels = np.argmax(scores, axis=-1) if len(scores) else np.empty((0,), dtype=int)
+    return (labels, scores, decoded) if return_images else (labels, scores)
+
+
+class ModelCache:
+    """
+    Loaded models with their weights, keyed by network module and weights file, so that a model is loaded only once
+    """
+
+    def __init__(self):
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def get(self, module, weights=None):
+        """
+        Get a model, loading it and its weights if it has not been loaded yet
+
+        :param module: the network module providing load_model() and loadWeights()
+        :type module: module
+        :param weights: the weights file name, or None to keep the initial weights
+        :type weights: str
+        :return: the model
+        :rtype: keras.Model
+        """
+        key = (module.__name__, weights)
+        with self._lock:
+            if key not in self._models:
+                model = module.load_model(load_weights=False)
+                if weights:
+                    module.loadWeights(model, filename=weights)
+                self._models[key] = model
+            return self._models[key]
+
+    def clear(self):
+        """
+        Release all models
+        """
+        with self._lock:
+            self._models.clear()
+
+
+def classify_files(models, module, weights, paths, progress=None, return_images=False):
+    """
+    Classify image files with a model, loading it if it is not in the model cache yet
+
+    :param models: the model cache
+    :type models: ModelCache
+    :param module: the network module
+    :type module: module
+    :param weights: the weights file name
+    :type weights: str
+    :param paths: the image file paths
+    :type paths: list of str
+    :param progress: a callable reporting the number of images classified and the total number of images
+    :type progress: callable
+    :param return_images: True to also return the images as read
+    :type return_images: bool
+    :return: the index of the best class and the score vector of each image, and the images if return_images is True
+    :rtype: tuple(ndarray, ndarray) or tuple(ndarray, ndarray, list)
+    """
+    configure_threads()
+    return predict_files(models.get(module, weights), paths, progress=progress, return_images=return_images)
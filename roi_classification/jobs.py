@@ -0,0 +1,194 @@
+"""
+Background jobs for the ROI classification plugin: long running tasks (model loading, inference, image extraction) run
+in a worker thread, report their progress in a progress dialog and can be cancelled. Failures are logged with their
+traceback and reported in a message box.
+"""
+import logging
+import threading
+import traceback
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Qt, Signal, Slot
+from PySide6.QtWidgets import QMessageBox, QProgressDialog
+
+logger = logging.getLogger(__name__)
+
+
+class JobCancelled(Exception):
+    """
+    Exception raised in a job when it has been cancelled
+    """
+
+
+class JobSignals(QObject):
+    """
+    The signals emitted by a Job
+    """
+    progress = Signal(int, int)
+    finished = Signal(object)
+    error = Signal(str, str)
+    cancelled = Signal()
+
+
+class Job(QRunnable):
+    """
+    A job calling a function in a worker thread. The function is passed a progress keyword argument, a callable
+    taking the amount of work done and the total amount of work, that emits the progress signal and raises JobCancelled
+    if the job has been cancelled. Functions should therefore report their progress regularly.
+    """
+
+    def __init__(self, function, *args, **kwargs):
+        super().__init__()
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = JobSignals()
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """
+        Request the job to stop at the next progress report
+        """
+        self._cancelled.set()
+
+    def progress(self, done, total):
+        """
+        Report the progress of the job
+
+        :param done: the amount of work done
+        :type done: int
+        :param total: the total amount of work
+        :type total: int
+        """
+        if self._cancelled.is_set():
+            raise JobCancelled()
+        self.signals.progress.emit(done, total)
+
+    def run(self):
+        """
+        Run the function and emit the finished, cancelled or error signal depending on its outcome. The error signal
+        carries the error message and the formatted traceback.
+        """
+        try:
+            self.progress(0, 0)
+            result = self.function(*self.args, progress=self.progress, **self.kwargs)
+        except JobCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            logger.exception('Job %s failed', getattr(self.function, '__qualname__', self.function))
+            self.signals.error.emit(f'{type(e).__name__}: {e}', traceback.format_exc())
+        else:
+            self.signals.finished.emit(result)
+
+
+class JobMonitor(QObject):
+    """
+    Follows a job from the GUI thread: updates its progress dialog and calls the callback with its result. Slots are
+    methods of this object so that the signals emitted from the worker thread are queued to the GUI thread.
+    """
+
+    def __init__(self, scheduler, job, dialog, title, on_finished=None):
+        super().__init__(scheduler)
+        self.scheduler = scheduler
+        self.job = job
+        self.dialog = dialog
+        self.title = title
+        self.on_finished = on_finished
+        dialog.canceled.connect(job.cancel)
+        job.signals.progress.connect(self.update)
+        job.signals.finished.connect(self.finish)
+        job.signals.error.connect(self.fail)
+        job.signals.cancelled.connect(self.close)
+
+    @Slot(int, int)
+    def update(self, done, total):
+        """
+        Show the progress of the job
+
+        :param done: the amount of work done
+        :type done: int
+        :param total: the total amount of work
+        :type total: int
+        """
+        self.dialog.setMaximum(total)
+        self.dialog.setValue(done)
+
+    @Slot(object)
+    def finish(self, result):
+        """
+        Close the progress dialog and pass the result to the callback
+
+        :param result: the result of the job
+        """
+        self.close()
+        if self.on_finished is not None:
+            self.on_finished(result)
+
+    @Slot(str, str)
+    def fail(self, message, details):
+        """
+        Close the progress dialog and report the error in a message box, the traceback being shown as its details
+
+        :param message: the error message
+        :type message: str
+        :param details: the formatted traceback
+        :type details: str
+        """
+        box = QMessageBox(QMessageBox.Critical, self.title, f'{self.title} failed: {message}', QMessageBox.Ok,
+                          self.dialog.parentWidget())
+        box.setDetailedText(details)
+        box.setAttribute(Qt.WA_DeleteOnClose)
+        self.close()
+        box.open()
+
+    @Slot()
+    def close(self):
+        """
+        Close and delete the progress dialog and forget the job
+        """
+        self.dialog.reset()
+        self.dialog.deleteLater()
+        self.scheduler.jobs.pop(self.job, None)
+        self.deleteLater()
+
+
+class JobScheduler(QObject):
+    """
+    Runs jobs one at a time in a dedicated thread, showing a progress dialog with a Cancel button for each job
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.jobs = {}
+
+    def submit(self, function, *args, title='Processing', on_finished=None, **kwargs):
+        """
+        Submit a job
+
+        :param function: the function to run, accepting a progress keyword argument
+        :type function: callable
+        :param args: the positional arguments of the function
+        :param title: the label of the progress dialog
+        :type title: str
+        :param on_finished: the function called in the GUI thread with the result of the job
+        :type on_finished: callable
+        :param kwargs: the keyword arguments of the function
+        :return: the job
+        :rtype: Job
+        """
+        job = Job(function, *args, **kwargs)
+        dialog = QProgressDialog(title, 'Cancel', 0, 0, self.parent())
+        dialog.setWindowModality(Qt.NonModal)
+        dialog.setMinimumDuration(500)
+        self.jobs[job] = JobMonitor(self, job, dialog, title, on_finished)
+        self.pool.start(job)
+        return job
+
+    def cancel_all(self):
+        """
+        Cancel all running and queued jobs
+        """
+        for job in list(self.jobs):
+            job.cancel()
+
@@ -0,0 +1,92 @@
+"""
+Rendering of ROI image sequences as a single mosaic image, with one row per ROI and one column per frame
+"""
+import numpy as np
+
+
+def class_colours(n_classes):
+    """
+    Get one RGB colour per class
+
+    :param n_classes: the number of classes
+    :type n_classes: int
+    :return: the colours, of shape (n_classes, 3)
+    :rtype: ndarray
+    """
+    from matplotlib import colormaps
+    return colormaps['tab10'](np.arange(n_classes) % 10)[:, :3].astype(np.float32)
+
+
+def build_mosaic(batch, labels=None, colours=None, padding=2, band=3):
+    """
+    Pack ROI images into one preallocated RGB canvas of uint8 values. Each cell holds one ROI image at one frame, with
+    a band below it coloured according to the predicted class when labels are given. Integer images are scaled
+    according to their data type range, float images are expected in [0, 1]. Images are converted to uint8 one ROI at
+    a time as they are copied into the canvas, so that no float copy of the whole mosaic is made.
+
+    :param batch: the ROI images, of shape (n_roi, n_frames, H, W, C) with C equal to 1 or 3
+    :type batch: ndarray
+    :param labels: the predicted class index for each ROI and frame, of shape (n_roi, n_frames)
+    :type labels: ndarray
+    :param colours: the RGB colour of each class, with values in [0, 1]
+    :type colours: ndarray
+    :param padding: the number of pixels between cells
+    :type padding: int
+    :param band: the height of the class band in pixels
+    :type band: int
+    :return: the mosaic and the (height, width) of a cell
+    :rtype: tuple(ndarray, tuple)
+    """
+    n_roi, n_frames, height, width, _ = batch.shape
+    band = band if labels is not None else 0
+    cell = (height + band + padding, width + padding)
+    canvas = np.full((n_roi * cell[0], n_frames * cell[1], 3), 255, dtype=np.uint8)
+    cells = canvas.reshape(n_roi, cell[0], n_frames, cell[1], 3)
+    images = cells[:, :height, :, :width, :]
+    if batch.dtype == np.uint8:
+        images[...] = np.moveaxis(batch, 1, 2)
+    else:
+        scale = 255 / np.iinfo(batch.dtype).max if np.issubdtype(batch.dtype, np.integer) else 255
+        scratch = np.empty(batch.shape[1:], dtype=np.float32)
+        for roi in range(n_roi):
+            np.multiply(batch[roi], scale, out=scratch, dtype=np.float32)
+            np.clip(scratch, 0, 255, out=scratch)
+            images[roi] = np.moveaxis(np.rint(scratch, out=scratch), 0, 1)
+    if labels is not None:
+        colours = np.rint(np.clip(colours, 0, 1) * 255).astype(np.uint8)
+        cells[:, height:height + band, :, :width, :] = colours[labels][:, None, :, None, :]
+    return canvas, cell
+
+
+def draw_mosaic(ax, batch, labels, roi_names, frames, class_names, max_tick_labels=50):
+    """
+    Draw ROI image sequences as one mosaic image, with ROI names and frame numbers as tick labels and a legend of the
+    class colours. When there are more than max_tick_labels rows or columns, only regularly spaced ones are labelled,
+    as tick labels are the most expensive part of the drawing.
+
+    :param ax: the axes
+    :type ax: matplotlib.axes.Axes
+    :param batch: the ROI images, of shape (n_roi, n_frames, H, W, C)
+    :type batch: ndarray
+    :param labels: the predicted class index for each ROI and frame, of shape (n_roi, n_frames)
+    :type labels: ndarray
+    :param roi_names: the ROI names
+    :type roi_names: list of str
+    :param frames: the frame numbers
+    :type frames: list of int
+    :param class_names: the class names
+    :type class_names: list of str
+    :param max_tick_labels: the maximum number of tick labels on each axis
+    :type max_tick_labels: int
+    """
+    from matplotlib.patches import Patch
+    colours = class_colours(len(class_names))
+    canvas, (cell_height, cell_width) = build_mosaic(batch, labels=labels, colours=colours)
+    ax.imshow(canvas, interpolation='nearest')
+    columns = np.arange(0, len(frames), max(1, -(-len(frames) // max_tick_labels)))
+    rows = np.arange(0, len(roi_names), max(1, -(-len(roi_names) // max_tick_labels)))
+    ax.set_xticks(columns * cell_width + batch.shape[3] / 2, labels=[frames[j] for j in columns], fontsize='xx-small')
+    ax.set_yticks(rows * cell_height + batch.shape[2] / 2, labels=[roi_names[i] for i in rows], fontsize='xx-small')
+    ax.tick_params(length=0)
+    ax.legend(handles=[Patch(color=colour, label=name) for colour, name in zip(colours, class_names)],
+              loc='upper left', bbox_to_anchor=(1, 1), fontsize='xx-small')
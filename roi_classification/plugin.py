@@ -0,0 +1,451 @@
+from functools import partial
+
+from PySide6.QtGui import QAction
+import numpy as np
+
+from pydetecdiv import plugins
+from pydetecdiv.app import PyDetecDiv, pydetecdiv_project
+from pydetecdiv.app.gui.Windows import MatplotViewer
+from instrumentation.metrics import instrumented
+
+from .batch import extract_roi_batch
+from .cache import FrameCache, group_rois_by_fov
+from .events import EventIndex, label_track
+from .heatmap import draw_heatmap, page_slice
+from .inference import ModelCache, classify_files
+from .jobs import JobScheduler
+from .mosaic import draw_mosaic
+from .results import prediction_results
+from .store import PredictionStore, fingerprint, prediction_store_path
+
+
+class Plugin(plugins.Plugin):
+    id_ = 'gmgm.plewniak.extensions.roiclassification'
+    version = '1.0.0'
+    name = 'Deep learning'
+    category = 'ROI classification'
+    parent = 'gmgm.plewniak.roiclassification'
+    #: The class transitions defining division and death events, None matching any class
+    division = ('large', 'small')
+    death = (None, 'dead')
+
+    def __init__(self):
+        super().__init__()
+        self.frame_cache = FrameCache()
+        self.test_results = None
+        self.predictions = None
+        self.roi_list = []
+        self.labels = None
+        self.events = None
+        self.models = ModelCache()
+        self._scheduler = None
+
+    @property
+    def scheduler(self):
+        """
+        The scheduler running the plugin's long tasks in the background, created on first use
+        """
+        if self._scheduler is None:
+            self._scheduler = JobScheduler(PyDetecDiv().main_window)
+        return self._scheduler
+
+    def addActions(self, menu):
+        if self.parent_plugin:
+            action_launch = QAction("Show results", self.parent_plugin.menu)
+            action_launch.triggered.connect(self.launch)
+            self.parent_plugin.menu.addAction(action_launch)
+            action_test_model = QAction("Test model", self.parent_plugin.menu)
+            action_test_model.triggered.connect(self.test_model)
+            self.parent_plugin.menu.addAction(action_test_model)
+
+    def launch(self):
+        self.frame_cache.clear()
+        self.scheduler.submit(self.load_predictions, title='Loading predictions', on_finished=self.show_results)
+
+    def show_results(self, loaded):
+        """
+        Keep the predictions loaded in the background, show them and save them in the project database
+
+        :param loaded: the prediction store, the ROIs, their label track and its event index, as returned by
+         load_predictions()
+        :type loaded: tuple(PredictionStore, list of ROI objects, ndarray, EventIndex)
+        """
+        self.predictions, self.roi_list, self.labels, self.events = loaded
+        self.show_sequence()
+        self.show_predictions_heatmap()
+        self.persist_predictions()
+
+    @instrumented('roi_classification.load_predictions')
+    def load_predictions(self, progress=None):
+        """
+        Load predictions from the prediction store saved next to the project and index their class transitions. This
+        is run in the background. If the parent plugin holds predictions, those that are not in the store yet are
+        written to it first, a store holding the predictions of another run being overwritten. Otherwise the store
+        from a previous run is opened read-only together with the ROIs it refers to. If there is no such store, or if
+        it was left incomplete by an interrupted run, it is rebuilt from the predictions saved in the project database.
+
+        :param progress: a callable reporting the number of ROIs written to the store and the total number of ROIs
+        :type progress: callable
+        :return: the prediction store, the ROIs, their label track and its event index
+        :rtype: tuple(PredictionStore, list of ROI objects, ndarray, EventIndex)
+        """
+        predictions = getattr(self.parent_plugin, 'predictions', None)
+        with pydetecdiv_project(PyDetecDiv().project_name) as project:
+            path = prediction_store_path(project)
+            if predictions is not None:
+                roi_list = self.parent_plugin.roi_list
+                store = PredictionStore.create(path, [roi.id_ for roi in roi_list], *predictions.shape[1:],
+                                               dtype=predictions.dtype, source=fingerprint(predictions))
+                store.write_from(predictions, progress=progress)
+            else:
+                if not PredictionStore.exists(path) or not PredictionStore(path).complete:
+                    self.restore_predictions(project, path, progress=progress)
+                store = PredictionStore(path)
+                roi_list = [project.get_object('ROI', id_) for id_ in store.roi_ids]
+        labels = label_track(store.view())
+        return store, roi_list, labels, EventIndex(labels)
+
+    def restore_predictions(self, project, path, progress=None):
+        """
+        Create the prediction store from the predictions saved in the project database by a previous run, chunk by
+        chunk of ROIs
+
+        :param project: the project
+        :type project: Project
+        :param path: the base path of the prediction store files
+        :type path: str
+        :param progress: a callable reporting the number of ROIs written to the store and the total number of ROIs
+        :type progress: callable
+        """
+        roi_ids = prediction_results.roi_ids(project)
+        t, last = prediction_results.frame_range(project)
+        store = PredictionStore.create(path, roi_ids, last + 1, len(self.parent_plugin.class_names),
+                                       source=prediction_results.source(project, roi_ids))
+        for start, chunk, scores in prediction_results.iter_scores(project, store.shape[2], roi_ids=roi_ids):
+            store.write(slice(start, start + len(chunk)), slice(t, None), scores)
+            store.flush()
+            if progress is not None:
+                progress(start + len(chunk), len(roi_ids))
+
+    def persist_predictions(self):
+        """
+        Save the predictions of the parent plugin in the project database in the background, unless they are saved
+        already, so that they can be reloaded and queried without being recomputed. Saved predictions are identified
+        by their fingerprint, predictions of another run are replaced.
+        """
+        predictions = getattr(self.parent_plugin, 'predictions', None)
+        if predictions is None:
+            return
+        roi_ids = [roi.id_ for roi in self.parent_plugin.roi_list]
+        source = self.predictions.source if self.predictions is not None else fingerprint(predictions)
+        with pydetecdiv_project(PyDetecDiv().project_name) as project:
+            if prediction_results.is_saved(project, roi_ids, source):
+                return
+        self.scheduler.submit(self.save_predictions, roi_ids, predictions, source, title='Saving predictions')
+
+    @instrumented('roi_classification.save_predictions')
+    def save_predictions(self, roi_ids, predictions, source=None, progress=None):
+        """
+        Save predictions in the project database, replacing those previously saved for the same ROIs
+
+        :param roi_ids: the ids of the ROIs, in the order of the first axis of predictions
+        :type roi_ids: list of int
+        :param predictions: the (n_roi, n_frames, n_classes) predictions
+        :type predictions: ndarray
+        :param source: the fingerprint of the predictions
+        :type source: str
+        :param progress: a callable reporting the number of ROIs saved and the total number of ROIs
+        :type progress: callable
+        """
+        with pydetecdiv_project(PyDetecDiv().project_name) as project:
+            prediction_results.save(project, roi_ids, predictions, progress=progress, source=source)
+
+    def frames_with_class(self, roi, class_name):
+        """
+        Get the frames where a ROI was predicted to be in a class, e.g. all frames where a ROI is dead, from the
+        predictions saved in the project database
+
+        :param roi: the ROI
+        :type roi: ROI object
+        :param class_name: the class name
+        :type class_name: str
+        :return: the sorted frames
+        :rtype: ndarray
+        """
+        with pydetecdiv_project(PyDetecDiv().project_name) as project:
+            return prediction_results.frames_with_label(project, roi.id_,
+                                                        self.parent_plugin.class_names.index(class_name))
+
+    def _class_index(self, class_name):
+        return None if class_name is None else self.parent_plugin.class_names.index(class_name)
+
+    def find_events(self, from_class=None, to_class=None):
+        """
+        Find the transitions of ROIs from a class to another over the whole experiment
+
+        :param from_class: the class name before the transition, None for any class
+        :type from_class: str
+        :param to_class: the class name after the transition, None for any class
+        :type to_class: str
+        :return: the ROIs and the frames of the transitions, sorted by ROI and frame
+        :rtype: tuple(list of ROI objects, ndarray)
+        """
+        rois, frames = self.events.transitions(self._class_index(from_class), self._class_index(to_class))
+        return [self.roi_list[i] for i in rois], frames
+
+    def count_events(self, from_class=None, to_class=None):
+        """
+        Count the transitions of ROIs from a class to another over the whole experiment
+
+        :param from_class: the class name before the transition, None for any class
+        :type from_class: str
+        :param to_class: the class name after the transition, None for any class
+        :type to_class: str
+        :return: the number of transitions
+        :rtype: int
+        """
+        return self.events.count(self._class_index(from_class), self._class_index(to_class))
+
+    def division_events(self):
+        """
+        Find division events, as defined by the division transition
+
+        :return: the ROIs and the frames of divisions
+        :rtype: tuple(list of ROI objects, ndarray)
+        """
+        return self.find_events(*self.division)
+
+    def death_events(self):
+        """
+        Find death events, as defined by the death transition
+
+        :return: the ROIs and the frames of deaths
+        :rtype: tuple(list of ROI objects, ndarray)
+        """
+        return self.find_events(*self.death)
+
+    @instrumented('roi_classification.get_roi_batch')
+    def get_roi_batch(self, roi_list=None, t=0, length=1, step=1, progress=None):
+        """
+        Get the images of a list of ROIs over a range of frames as one array of shape (n_roi, n_frames, H, W, C)
+
+        :param roi_list: the ROIs, defaults to the ROIs of the current predictions
+        :type roi_list: list of ROI objects
+        :param t: the first frame
+        :type t: int
+        :param length: the number of frames spanned by the range
+        :type length: int
+        :param step: the step between two frames
+        :type step: int
+        :param progress: a callable reporting the number of frames extracted and the total number of frames
+        :type progress: callable
+        :return: the ROI images
+        :rtype: ndarray
+        """
+        if roi_list is None:
+            roi_list = self.roi_list
+        with pydetecdiv_project(PyDetecDiv().project_name) as project:
+            fov_rois = group_rois_by_fov(project, roi_list)
+            return extract_roi_batch(self.parent_plugin, fov_rois, roi_list, range(t, t + length, step),
+                                     self.frame_cache, progress=progress)
+
+    @instrumented('roi_classification.show_sequence')
+    def show_sequence(self, t=0, length=2, step=1, mosaic=True):
+        """
+        Show the images of ROIs over a range of frames with their predicted class. Images are extracted in the
+        background and drawn when they are all available. In mosaic mode, all images are packed into a single image
+        drawn at once, otherwise each image is drawn in its own axes.
+
+        :param t: the first frame
+        :type t: int
+        :param length: the number of frames spanned by the range
+        :type length: int
+        :param step: the step between two frames
+        :type step: int
+        :param mosaic: True to draw a mosaic, False to draw a grid of axes
+        :type mosaic: bool
+        """
+        self.scheduler.submit(self.get_roi_batch, t=t, length=length, step=step, title='Extracting ROI images',
+                              on_finished=partial(self.draw_sequence, t=t, length=length, step=step, mosaic=mosaic))
+
+    @instrumented('roi_classification.draw_sequence')
+    def draw_sequence(self, batch, t=0, length=2, step=1, mosaic=True):
+        """
+        Draw the images of ROIs over a range of frames with their predicted class
+
+        :param batch: the ROI images, as returned by get_roi_batch()
+        :type batch: ndarray
+        :param t: the first frame
+        :type t: int
+        :param length: the number of frames spanned by the range
+        :type length: int
+        :param step: the step between two frames
+        :type step: int
+        :param mosaic: True to draw a mosaic, False to draw a grid of axes
+        :type mosaic: bool
+        """
+        from pydetecdiv.domain.Image import Image
+
+        frames = range(t, t + length, step)
+        labels = self.labels[:, t:t + length:step]
+
+        if mosaic:
+            plot_viewer = MatplotViewer(PyDetecDiv().main_window.active_subwindow)
+            PyDetecDiv().main_window.active_subwindow.addTab(plot_viewer, 'Sequences')
+            draw_mosaic(plot_viewer.axes, batch, labels, [roi.name for roi in self.roi_list], list(frames),
+                        self.parent_plugin.class_names)
+        else:
+            plot_viewer = MatplotViewer(PyDetecDiv().main_window.active_subwindow, rows=len(self.roi_list),
+                                        columns=len(frames))
+            PyDetecDiv().main_window.active_subwindow.addTab(plot_viewer, 'Sequences')
+            for i, roi in enumerate(self.roi_list):
+                plot_viewer.axes[i, 0].set_ylabel(f'{roi.name}', fontsize='xx-small')
+                for j, frame in enumerate(frames):
+                    plot_viewer.axes[i, j].set_title(f'{frame} ({self.parent_plugin.class_names[labels[i, j]]})',
+                                                     fontsize='xx-small')
+                    plot_viewer.axes[i, j].set_xticks([])
+                    plot_viewer.axes[i, j].set_yticks([])
+                    Image(batch[i, j]).show(plot_viewer.axes[i, j])
+
+        plot_viewer.canvas.draw()
+        PyDetecDiv().main_window.active_subwindow.setCurrentWidget(plot_viewer)
+
+    def show_predictions_heatmap(self, t=0, length=None, page=None, rows_per_page=100, mode='scores',
+                                 max_columns=2000, downsampling='max'):
+        """
+        Show the predictions of ROIs as heatmaps, one tab per page of ROIs. Each page is drawn as a single image when
+        its tab is shown for the first time, and long time series are downsampled to at most max_columns time points
+        so that only the visible rows and columns are rasterized.
+
+        :param t: the first frame
+        :type t: int
+        :param length: the number of frames, defaults to all frames from t
+        :type length: int
+        :param page: the only page of ROIs to show, starting at 0, defaults to all pages
+        :type page: int
+        :param rows_per_page: the number of ROIs per page
+        :type rows_per_page: int
+        :param mode: 'scores' to show the score of each class, 'argmax' to show the best class only
+        :type mode: str
+        :param max_columns: the maximum number of time points
+        :type max_columns: int
+        :param downsampling: the downsampling method along time, 'max', 'min' or 'argmax'
+        :type downsampling: str
+        """
+        tabs = PyDetecDiv().main_window.active_subwindow
+        n_pages = page_slice(0, rows_per_page, len(self.roi_list))[1]
+        pending = {}
+        for p in range(n_pages) if page is None else [page]:
+            rois, _ = page_slice(p, rows_per_page, len(self.roi_list))
+            heatmap_plot = MatplotViewer(tabs)
+            tabs.addTab(heatmap_plot, 'Predictions' if n_pages == 1 else f'Predictions {p + 1}/{n_pages}')
+            pending[heatmap_plot] = partial(self.draw_predictions_heatmap, heatmap_plot, rois, t=t, length=length,
+                                            mode=mode, max_columns=max_columns, downsampling=downsampling)
+
+        def draw_page(index):
+            draw = pending.pop(tabs.widget(index), None)
+            if draw is not None:
+                draw()
+            if not pending:
+                tabs.currentChanged.disconnect(draw_page)
+
+        first = next(iter(pending))
+        tabs.currentChanged.connect(draw_page)
+        tabs.setCurrentWidget(first)
+        if first in pending:
+            draw_page(tabs.indexOf(first))
+
+    @instrumented('roi_classification.draw_predictions_heatmap')
+    def draw_predictions_heatmap(self, heatmap_plot, rois, t=0, length=None, mode='scores', max_columns=2000,
+                                 downsampling='max'):
+        """
+        Draw the predictions of a page of ROIs as a single heatmap image
+
+        :param heatmap_plot: the viewer to draw the heatmap in
+        :type heatmap_plot: MatplotViewer
+        :param rois: the indices of the ROIs of the page
+        :type rois: slice
+        :param t: the first frame
+        :type t: int
+        :param length: the number of frames, defaults to all frames from t
+        :type length: int
+        :param mode: 'scores' to show the score of each class, 'argmax' to show the best class only
+        :type mode: str
+        :param max_columns: the maximum number of time points
+        :type max_columns: int
+        :param downsampling: the downsampling method along time, 'max', 'min' or 'argmax'
+        :type downsampling: str
+        """
+        draw_heatmap(heatmap_plot.axes, self.predictions.view(rois, t=t, length=length),
+                     [roi.name for roi in self.roi_list[rois]], self.parent_plugin.class_names, t=t, mode=mode,
+                     max_columns=max_columns, downsampling=downsampling)
+        heatmap_plot.canvas.draw()
+
+    def test_model(self, ):
+        """
+        Classify test images with the network and weights selected in the parent plugin's GUI. The model is loaded and
+        run in the background, and kept loaded for the next tests.
+        """
+        module = self.parent_plugin.gui.network.currentData()
+        weights = self.parent_plugin.gui.weights.currentData()
+
+        images = np.array(
+            [
+                '/NAS/DataGS02/Fred/div_1_first_tests/trainingdataset/images/small/Pos0_1_221_frame_0410.tif',
+                '/NAS/DataGS02/Fred/div_1_first_tests/trainingdataset/images/large/Pos0_1_83_frame_0211.tif',
+                '/NAS/DataGS02/Fred/div_1_first_tests/trainingdataset/images/empty/Pos0_1_47_frame_0018.tif'
+            ])
+
+        self.scheduler.submit(self.run_test_model, module, weights, images, title='Testing model',
+                              on_finished=self.show_test_results)
+
+    @instrumented('roi_classification.run_test_model')
+    def run_test_model(self, module, weights, images, progress=None):
+        """
+        Classify images with a model, loading it if it is not in the model cache yet
+
+        :param module: the network module
+        :type module: module
+        :param weights: the weights file name
+        :type weights: str
+        :param images: the image file paths
+        :type images: list of str
+        :param progress: a callable reporting the number of images classified and the total number of images
+        :type progress: callable
+        :return: the image file paths, the images as read for inference, the index of the best class and the score
+         vector of each image
+        :rtype: tuple(list, list, ndarray, ndarray)
+        """
+        labels, scores, tensors = classify_files(self.models, module, weights, images, progress=progress,
+                                                 return_images=True)
+        return images, tensors, labels, scores
+
+    @instrumented('roi_classification.show_test_results')
+    def show_test_results(self, results):
+        """
+        Show test images with their predicted class and histogram. Images are those read for inference, they are not
+        read again.
+
+        :param results: the image file paths, the images, the index of the best class and the score vector of each
+         image, as returned by run_test_model()
+        :type results: tuple(list, list, ndarray, ndarray)
+        """
+        import os
+        from pydetecdiv.domain.Image import Image
+
+        class_names = ['clog', 'dead', 'empty', 'large', 'small', 'unbud']
+        self.test_results = results
+        images, tensors, labels, scores = results
+
+        plot_viewer = MatplotViewer(PyDetecDiv().main_window.active_subwindow, rows=len(images), columns=2)
+        PyDetecDiv().main_window.active_subwindow.addTab(plot_viewer, 'Predictions')
+
+        for i, (fichier, tensor, max_index, score) in enumerate(zip(images, tensors, labels, scores)):
+            image = Image(tensor)
+            plot_viewer.axes[i][0].set_title(os.path.basename(fichier))
+            image.show(ax=plot_viewer.axes[i][0])
+            image.channel_histogram(ax=plot_viewer.axes[i][1], bins=64)
+            plot_viewer.axes[i][0].text(1, 5, f'{class_names[max_index]}: {score[max_index]:.2f}',
+                                        {'fontsize': 8, 'color': 'yellow'})
+        plot_viewer.canvas.draw()
+        PyDetecDiv().main_window.active_subwindow.setCurrentWidget(plot_viewer)
@@ -0,0 +1,365 @@
+"""
+Persistent storage of ROI classification predictions in the project database: one row per ROI and frame holding the
+index of the best class, its score and optionally the packed vector of all class scores, and the fingerprint of the
+predictions saved for each ROI. Predictions are written in bulk in a single transaction and read back directly into
+NumPy arrays, chunk by chunk of ROIs if needed.
+"""
+import numpy as np
+import sqlalchemy
+from sqlalchemy import Column, Float, ForeignKey, Index, Integer, LargeBinary, SmallInteger, String, Table
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import registry
+
+Base = registry().generate_base()
+
+#: Description of the project ROI table referred to by predictions, which is never created by the plugin
+roi_table = Table('ROI', Base.metadata, Column('id_', Integer, primary_key=True), extend_existing=True)
+
+
+class Prediction(Base):
+    """
+    The DAO defining the table of predictions, keyed by ROI and frame. The primary key indexes ROIs, frames have their
+    own index.
+    """
+    __tablename__ = 'roi_classification_predictions'
+    __table_args__ = (Index('ix_roi_classification_predictions_frame', 'frame'), {'extend_existing': True})
+    roi = Column(Integer, ForeignKey('ROI.id_'), primary_key=True)
+    frame = Column(Integer, primary_key=True)
+    label = Column(SmallInteger, nullable=False)
+    score = Column(Float, nullable=False)
+    scores = Column(LargeBinary, nullable=True)
+
+
+class PredictionSource(Base):
+    """
+    The DAO defining the table of the fingerprints of the predictions saved for each ROI, identifying the run that
+    computed them
+    """
+    __tablename__ = 'roi_classification_prediction_sources'
+    __table_args__ = {'extend_existing': True}
+    roi = Column(Integer, ForeignKey('ROI.id_'), primary_key=True)
+    source = Column(String(64), nullable=False)
+
+
+class PredictionResults:
+    """
+    Store for predictions saved in the table defined by a DAO class with roi, frame, label, score and scores columns,
+    and for their fingerprints in the table defined by a DAO class with roi and source columns. Score vectors are
+    packed as float32 bytes.
+    """
+
+    def __init__(self, dao, source_dao):
+        self.dao = dao
+        self.source_dao = source_dao
+        self._databases = set()
+
+    @property
+    def table(self):
+        """
+        The predictions table
+        """
+        return self.dao.__table__
+
+    @property
+    def source_table(self):
+        """
+        The table of prediction fingerprints
+        """
+        return self.source_dao.__table__
+
+    def create_schema(self, engine):
+        """
+        Create the predictions and fingerprints tables and their indexes if they do not exist yet. This is done only
+        once per database
+
+        :param engine: the engine of the project database
+        :type engine: sqlalchemy.engine.Engine
+        """
+        if str(engine.url) not in self._databases:
+            self.dao.metadata.create_all(engine, tables=[self.table, self.source_table])
+            self._databases.add(str(engine.url))
+
+    def has_table(self, engine):
+        """
+        Check whether the predictions table exists in the project database
+
+        :param engine: the engine of the project database
+        :type engine: sqlalchemy.engine.Engine
+        :return: True if the table exists, False otherwise
+        :rtype: bool
+        """
+        if str(engine.url) in self._databases:
+            return True
+        inspector = sqlalchemy.inspect(engine)
+        if inspector.has_table(self.table.name) and inspector.has_table(self.source_table.name):
+            self._databases.add(str(engine.url))
+            return True
+        return False
+
+    def save(self, project, roi_ids, predictions, t=0, keep_scores=True, chunk_size=64, progress=None, source=None):
+        """
+        Save the predictions of an array of shape (n_roi, n_frames, n_classes), replacing those previously saved for
+        the same ROIs and frames, together with their fingerprint. When a fingerprint is given, the predictions
+        identify a whole run and all predictions previously saved for the ROIs are replaced, whatever their frames, so
+        that the rows of a ROI never mix two runs. All rows are written in a single transaction, with one executemany
+        statement per chunk of ROIs.
+
+        :param project: the project
+        :type project: Project
+        :param roi_ids: the ids of the ROIs, in the order of the first axis of predictions
+        :type roi_ids: list of int
+        :param predictions: the predictions
+        :type predictions: ndarray
+        :param t: the frame of the first prediction along the second axis
+        :type t: int
+        :param keep_scores: True to save the scores of all classes, False to save only the best class and its score
+        :type keep_scores: bool
+        :param chunk_size: the number of ROIs written per statement
+        :type chunk_size: int
+        :param progress: a callable taking the number of ROIs saved and the total number of ROIs, called after each
+         chunk
+        :type progress: callable
+        :param source: the fingerprint of the predictions, None if unknown
+        :type source: str
+        """
+        self.create_schema(project.repository.engine)
+        roi_ids = np.asarray(roi_ids, dtype=np.int64)
+        n_frames = predictions.shape[1]
+        frames = np.arange(t, t + n_frames)
+        session = project.repository.session
+        try:
+            for start in range(0, len(roi_ids), chunk_size):
+                rois = roi_ids[start:start + chunk_size]
+                chunk = np.asarray(predictions[start:start + chunk_size], dtype=np.float32)
+                replaced = self.table.c.roi.in_(rois.tolist())
+                if source is None:
+                    replaced &= self.table.c.frame.between(t, t + n_frames - 1)
+                session.execute(delete(self.table).where(replaced))
+                session.execute(delete(self.source_table).where(self.source_table.c.roi.in_(rois.tolist())))
+                if source is not None:
+                    session.execute(insert(self.source_table),
+                                    [{'roi': roi, 'source': source} for roi in rois.tolist()])
+                labels = chunk.argmax(axis=-1)
+                scores = np.take_along_axis(chunk, labels[..., None], axis=-1)[..., 0]
+                packed = ([vector.tobytes() for vector in chunk.reshape(-1, chunk.shape[-1])] if keep_scores
+                          else [None] * labels.size)
+                session.execute(insert(self.table), [
+                    {'roi': roi, 'frame': frame, 'label': label, 'score': score, 'scores': vector}
+                    for roi, frame, label, score, vector in zip(np.repeat(rois, n_frames).tolist(),
+                                                                np.tile(frames, len(rois)).tolist(),
+                                                                labels.ravel().tolist(), scores.ravel().tolist(),
+                                                                packed)])
+                if progress is not None:
+                    progress(min(start + chunk_size, len(roi_ids)), len(roi_ids))
+        except Exception:
+            session.rollback()
+            raise
+        project.commit()
+
+    def is_saved(self, project, roi_ids, source):
+        """
+        Check whether the predictions with a fingerprint are those saved for all ROIs
+
+        :param project: the project
+        :type project: Project
+        :param roi_ids: the ids of the ROIs
+        :type roi_ids: list of int
+        :param source: the fingerprint of the predictions
+        :type source: str
+        :return: True if the saved predictions of all ROIs have this fingerprint, False otherwise
+        :rtype: bool
+        """
+        if source is None or not self.has_table(project.repository.engine):
+            return False
+        query = select(self.source_table.c.roi).where(self.source_table.c.source == source)
+        saved = np.fromiter(project.repository.session.execute(query).scalars(), dtype=np.int64)
+        return bool(np.isin(np.asarray(roi_ids, dtype=np.int64), saved).all())
+
+    def source(self, project, roi_ids=None):
+        """
+        Get the fingerprint of the predictions saved for ROIs
+
+        :param project: the project
+        :type project: Project
+        :param roi_ids: the ids of the ROIs, defaults to all ROIs having saved predictions
+        :type roi_ids: list of int
+        :return: the fingerprint, None if it is unknown or if the predictions of the ROIs have different fingerprints
+        :rtype: str
+        """
+        if not self.has_table(project.repository.engine):
+            return None
+        query = select(self.source_table.c.roi, self.source_table.c.source)
+        rows = dict(project.repository.session.execute(query).all())
+        roi_ids = self.roi_ids(project) if roi_ids is None else roi_ids
+        sources = {rows.get(int(roi_id)) for roi_id in roi_ids}
+        return sources.pop() if len(sources) == 1 else None
+
+    def frame_range(self, project):
+        """
+        Get the first and last frames of the saved predictions
+
+        :param project: the project
+        :type project: Project
+        :return: the first and last frames, (0, -1) if there are no saved predictions
+        :rtype: tuple(int, int)
+        """
+        if not self.has_table(project.repository.engine):
+            return 0, -1
+        query = select(func.min(self.table.c.frame), func.max(self.table.c.frame))
+        first, last = project.repository.session.execute(query).one()
+        return (0, -1) if first is None else (int(first), int(last))
+
+    def roi_ids(self, project):
+        """
+        Get the ids of the ROIs having saved predictions
+
+        :param project: the project
+        :type project: Project
+        :return: the sorted ROI ids
+        :rtype: ndarray
+        """
+        if not self.has_table(project.repository.engine):
+            return np.empty((0,), dtype=np.int64)
+        query = select(self.table.c.roi).distinct().order_by(self.table.c.roi)
+        return np.fromiter(project.repository.session.execute(query).scalars(), dtype=np.int64)
+
+    def load(self, project, roi_ids=None):
+        """
+        Load the saved predictions of ROIs as dense arrays. Missing predictions have the label -1 and a score of 0.
+
+        :param project: the project
+        :type project: Project
+        :param roi_ids: the ids of the ROIs, defaults to all ROIs having saved predictions
+        :type roi_ids: list of int
+        :return: the ROI ids, the frame of the first column, the (n_roi, n_frames) labels and the (n_roi, n_frames)
+         scores of the best class
+        :rtype: tuple(ndarray, int, ndarray, ndarray)
+        """
+        roi_ids, rows, t = self._fetch(project, roi_ids, self.table.c.label, self.table.c.score)
+        n_frames = int(rows[1].max()) - t + 1 if len(rows[1]) else 0
+        labels = np.full((len(roi_ids), n_frames), -1, dtype=np.int16)
+        scores = np.zeros((len(roi_ids), n_frames), dtype=np.float32)
+        index = (np.searchsorted(roi_ids, rows[0]), rows[1] - t)
+        labels[index] = rows[2]
+        scores[index] = rows[3]
+        return roi_ids, t, labels, scores
+
+    def load_scores(self, project, n_classes, roi_ids=None):
+        """
+        Load the saved predictions of ROIs as a dense (n_roi, n_frames, n_classes) array of scores. For predictions
+        saved without their score vector, only the score of the best class is set.
+
+        :param project: the project
+        :type project: Project
+        :param n_classes: the number of classes
+        :type n_classes: int
+        :param roi_ids: the ids of the ROIs, defaults to all ROIs having saved predictions
+        :type roi_ids: list of int
+        :return: the ROI ids, the frame of the first column and the scores
+        :rtype: tuple(ndarray, int, ndarray)
+        """
+        roi_ids, rows, t = self._fetch(project, roi_ids, self.table.c.label, self.table.c.score, self.table.c.scores)
+        n_frames = int(rows[1].max()) - t + 1 if len(rows[1]) else 0
+        return roi_ids, t, self._dense_scores(roi_ids, rows, t, n_frames, n_classes)
+
+    def iter_scores(self, project, n_classes, roi_ids=None, chunk_size=64):
+        """
+        Load the saved predictions chunk by chunk of ROIs, as dense (n_chunk, n_frames, n_classes) arrays of scores
+        spanning the same frames, so that all predictions are never held in memory at once
+
+        :param project: the project
+        :type project: Project
+        :param n_classes: the number of classes
+        :type n_classes: int
+        :param roi_ids: the ids of the ROIs, defaults to all ROIs having saved predictions
+        :type roi_ids: list of int
+        :param chunk_size: the number of ROIs loaded at once
+        :type chunk_size: int
+        :return: a generator of the index of the first ROI of the chunk in the sorted ROI ids, the ROI ids of the chunk
+         and their scores, starting at the first frame returned by frame_range()
+        :rtype: generator of tuple(int, ndarray, ndarray)
+        """
+        roi_ids = self.roi_ids(project) if roi_ids is None else np.unique(np.asarray(roi_ids, dtype=np.int64))
+        t, last = self.frame_range(project)
+        for start in range(0, len(roi_ids), chunk_size):
+            chunk, rows, _ = self._fetch(project, roi_ids[start:start + chunk_size], self.table.c.label,
+                                         self.table.c.score, self.table.c.scores)
+            yield start, chunk, self._dense_scores(chunk, rows, t, last - t + 1, n_classes)
+
+    def frames_with_label(self, project, roi_id, label):
+        """
+        Get the frames where a ROI was predicted to be in a class, e.g. all frames where a ROI is dead
+
+        :param project: the project
+        :type project: Project
+        :param roi_id: the ROI id
+        :type roi_id: int
+        :param label: the class index
+        :type label: int
+        :return: the sorted frames
+        :rtype: ndarray
+        """
+        if not self.has_table(project.repository.engine):
+            return np.empty((0,), dtype=np.int64)
+        query = (select(self.table.c.frame).where(self.table.c.roi == roi_id, self.table.c.label == label)
+                 .order_by(self.table.c.frame))
+        return np.fromiter(project.repository.session.execute(query).scalars(), dtype=np.int64)
+
+    def count(self, project, roi_ids=None):
+        """
+        Count the saved predictions
+
+        :param project: the project
+        :type project: Project
+        :param roi_ids: only count the predictions of these ROIs
+        :type roi_ids: list of int
+        :return: the number of predictions
+        :rtype: int
+        """
+        if not self.has_table(project.repository.engine):
+            return 0
+        query = select(func.count()).select_from(self.table)
+        if roi_ids is not None:
+            query = query.where(self.table.c.roi.in_([int(roi_id) for roi_id in roi_ids]))
+        return project.repository.session.execute(query).scalar()
+
+    @staticmethod
+    def _dense_scores(roi_ids, rows, t, n_frames, n_classes):
+        """
+        Build the dense (n_roi, n_frames, n_classes) array of scores from the rows fetched for sorted ROI ids
+        """
+        scores = np.zeros((len(roi_ids), n_frames, n_classes), dtype=np.float32)
+        index = (np.searchsorted(roi_ids, rows[0]), rows[1] - t)
+        packed = np.array([vector is not None for vector in rows[4]], dtype=bool)
+        if packed.any():
+            scores[index[0][packed], index[1][packed]] = np.frombuffer(
+                b''.join(vector for vector in rows[4] if vector is not None), dtype=np.float32).reshape(-1, n_classes)
+        scores[index[0][~packed], index[1][~packed], rows[2][~packed]] = rows[3][~packed]
+        return scores
+
+    def _fetch(self, project, roi_ids, *columns):
+        """
+        Fetch columns of the predictions of ROIs as arrays, together with the roi and frame columns
+
+        :return: the sorted ROI ids, the column arrays and the first frame
+        :rtype: tuple(ndarray, list of ndarray, int)
+        """
+        if roi_ids is not None:
+            roi_ids = np.unique(np.asarray(roi_ids, dtype=np.int64))
+        if not self.has_table(project.repository.engine):
+            roi_ids = np.empty((0,), dtype=np.int64) if roi_ids is None else roi_ids
+            return roi_ids, [np.empty((0,), dtype=np.int64)] * 4 + [[]], 0
+        query = select(self.table.c.roi, self.table.c.frame, *columns)
+        if roi_ids is not None:
+            query = query.where(self.table.c.roi.in_(roi_ids.tolist()))
+        rows = list(zip(*project.repository.session.execute(query)))
+        if roi_ids is None:
+            roi_ids = np.unique(np.asarray(rows[0], dtype=np.int64)) if rows else np.empty((0,), dtype=np.int64)
+        if not rows:
+            return roi_ids, [np.empty((0,), dtype=np.int64)] * 4 + [[]], 0
+        arrays = [np.asarray(rows[0], dtype=np.int64), np.asarray(rows[1], dtype=np.int64),
+                  np.asarray(rows[2], dtype=np.int64), np.asarray(rows[3], dtype=np.float32)] + list(rows[4:])
+        return roi_ids, arrays, int(arrays[1].min())
+
+
+prediction_results = PredictionResults(Prediction, PredictionSource)
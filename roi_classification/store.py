@@ -0,0 +1,193 @@
+"""
+On-disk storage of ROI classification predictions in memory-mapped .npy files saved next to the project database
+"""
+import hashlib
+import os
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+
+def prediction_store_path(project):
+    """
+    Get the base path of the prediction store of a project, i.e. the path of the project database without extension
+
+    :param project: the project
+    :type project: Project
+    :return: the base path of the prediction store files
+    :rtype: str
+    """
+    return f'{os.path.splitext(project.repository.engine.url.database)[0]}_roi_predictions'
+
+
+def fingerprint(predictions, chunk_size=64):
+    """
+    Get a fingerprint of predictions, identifying the run that computed them. Predictions are hashed chunk by chunk of
+    ROIs so that memory mapped predictions are not loaded at once.
+
+    :param predictions: the predictions of shape (n_roi, n_frames, n_classes)
+    :type predictions: ndarray
+    :param chunk_size: the number of ROIs hashed at once
+    :type chunk_size: int
+    :return: the hexadecimal digest of the predictions
+    :rtype: str
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f'{predictions.shape}{np.dtype(predictions.dtype).str}'.encode())
+    for start in range(0, predictions.shape[0], chunk_size):
+        digest.update(np.ascontiguousarray(predictions[start:start + chunk_size]).data)
+    return digest.hexdigest()
+
+
+class PredictionStore:
+    """
+    Predictions for n_roi ROIs over n_frames frames stored as a (n_roi, n_frames, n_classes) memory-mapped array, with
+    a (n_roi, n_frames) mask recording which predictions have already been written, the ids of the ROIs and the
+    fingerprint of the predictions being written, if any. Data are only loaded in memory when they are accessed, and
+    slices returned by view() are views on the mapped files, not copies.
+    """
+
+    def __init__(self, path, mode='r'):
+        self.path = path
+        self.scores = open_memmap(f'{path}.scores.npy', mode=mode)
+        self.done = open_memmap(f'{path}.done.npy', mode=mode)
+        self.roi_ids = np.load(f'{path}.rois.npy')
+
+    @staticmethod
+    def exists(path):
+        """
+        Check whether a prediction store exists at path
+
+        :param path: the base path of the store files
+        :type path: str
+        :return: True if the store exists, False otherwise
+        :rtype: bool
+        """
+        return all(os.path.exists(f'{path}.{suffix}.npy') for suffix in ['scores', 'done', 'rois'])
+
+    @property
+    def source(self):
+        """
+        The fingerprint of the predictions written to the store, None if it is unknown
+        """
+        if not os.path.exists(f'{self.path}.source'):
+            return None
+        with open(f'{self.path}.source') as file:
+            return file.read().strip() or None
+
+    @source.setter
+    def source(self, source):
+        with open(f'{self.path}.source', 'w') as file:
+            file.write(source or '')
+
+    @classmethod
+    def create(cls, path, roi_ids, n_frames, n_classes, dtype=np.float32, source=None):
+        """
+        Open the prediction store at path for writing, creating it if it does not exist or if it does not hold the
+        predictions for the same ROIs and dimensions. An existing matching store is reused so that an interrupted run
+        can be resumed, but only if it was written from the same source: predictions of another source are all marked
+        as not written, so that they are replaced.
+
+        :param path: the base path of the store files
+        :type path: str
+        :param roi_ids: the ids of the ROIs
+        :type roi_ids: list of int
+        :param n_frames: the number of frames
+        :type n_frames: int
+        :param n_classes: the number of classes
+        :type n_classes: int
+        :param dtype: the data type of the scores
+        :type dtype: numpy dtype
+        :param source: the fingerprint of the predictions to write, see fingerprint(). None if unknown, in which case
+         an existing store is never resumed.
+        :type source: str
+        :return: the prediction store
+        :rtype: PredictionStore
+        """
+        roi_ids = np.asarray(roi_ids, dtype=np.int64)
+        if cls.exists(path):
+            store = cls(path, mode='r+')
+            if np.array_equal(store.roi_ids, roi_ids) and store.scores.shape == (len(roi_ids), n_frames, n_classes):
+                if source is None or store.source != source:
+                    store.done[...] = False
+                    store.flush()
+                    store.source = source
+                return store
+            del store
+        open_memmap(f'{path}.scores.npy', mode='w+', dtype=dtype, shape=(len(roi_ids), n_frames, n_classes)).flush()
+        open_memmap(f'{path}.done.npy', mode='w+', dtype=bool, shape=(len(roi_ids), n_frames)).flush()
+        np.save(f'{path}.rois.npy', roi_ids)
+        store = cls(path, mode='r+')
+        store.source = source
+        return store
+
+    @property
+    def shape(self):
+        """
+        The shape of the predictions array
+        """
+        return self.scores.shape
+
+    @property
+    def complete(self):
+        """
+        True if all predictions have been written
+        """
+        return bool(self.done.all())
+
+    def write(self, rois, frames, scores):
+        """
+        Write predictions
+
+        :param rois: the ROI indices
+        :type rois: int, slice or array of int
+        :param frames: the frame indices
+        :type frames: int, slice or array of int
+        :param scores: the predictions for these ROIs and frames
+        :type scores: ndarray
+        """
+        self.scores[rois, frames, ...] = scores
+        self.done[rois, frames] = True
+
+    def write_from(self, predictions, chunk_size=64, progress=None):
+        """
+        Copy the predictions of an array of shape (n_roi, n_frames, n_classes) that have not been written yet, chunk
+        by chunk of ROIs
+
+        :param predictions: the predictions
+        :type predictions: ndarray
+        :param chunk_size: the number of ROIs in a chunk
+        :type chunk_size: int
+        :param progress: a callable taking the number of ROIs written and the total number of ROIs, called after each
+         chunk
+        :type progress: callable
+        """
+        for start in range(0, self.shape[0], chunk_size):
+            rois = slice(start, start + chunk_size)
+            if not self.done[rois].all():
+                self.write(rois, slice(None), predictions[rois])
+                self.flush()
+            if progress is not None:
+                progress(min(start + chunk_size, self.shape[0]), self.shape[0])
+
+    def view(self, rois=slice(None), t=0, length=None):
+        """
+        Get a view on predictions for some ROIs over a range of frames
+
+        :param rois: the ROI indices
+        :type rois: slice
+        :param t: the first frame
+        :type t: int
+        :param length: the number of frames, defaults to all frames from t
+        :type length: int
+        :return: the predictions as a (n_roi, n_frames, n_classes) view
+        :rtype: ndarray
+        """
+        return self.scores[rois, t:None if length is None else t + length, ...]
+
+    def flush(self):
+        """
+        Write pending changes to disk
+        """
+        self.scores.flush()
+        self.done.flush()
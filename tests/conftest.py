@@ -0,0 +1,7 @@
+"""
+Make the plugin packages importable from the tests, as they are from the plugin directory of the application
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
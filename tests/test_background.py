@@ -0,0 +1,112 @@
+import threading
+import time
+
+import pytest
+
+QtCore = pytest.importorskip('PySide6.QtCore')
+
+from result_db_example.worker import BackgroundRefresh, BackgroundTask
+
+
+@pytest.fixture(scope='module')
+def app():
+    return QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+
+
+def wait_until(app, condition, timeout=5):
+    end = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < end, 'timed out'
+        app.processEvents()
+        time.sleep(0.005)
+
+
+def test_refresh_coalesces_requests(app):
+    calls, results = [], []
+    gui_thread = threading.get_ident()
+
+    def function(value):
+        calls.append((value, threading.get_ident()))
+        return value * 2
+
+    refresh = BackgroundRefresh(function, results.append, delay=20)
+    for value in range(5):
+        refresh.request(value)
+    wait_until(app, lambda: results)
+    assert results == [8]
+    assert [value for value, _ in calls] == [4] and calls[0][1] != gui_thread
+
+
+def test_refresh_reruns_once_after_running_call(app):
+    started, release, results = threading.Event(), threading.Event(), []
+
+    def function(value):
+        started.set()
+        release.wait(5)
+        return value
+
+    refresh = BackgroundRefresh(function, results.append, delay=0)
+    refresh.request(1)
+    wait_until(app, started.is_set)
+    for value in (2, 3):
+        refresh.request(value)
+        wait_until(app, lambda: not refresh.timer.isActive())
+    assert refresh.pending
+    release.set()
+    wait_until(app, lambda: len(results) == 2)
+    assert results == [1, 3]
+
+
+def test_refresh_failure_is_logged(app, caplog):
+    results = []
+
+    def function(value):
+        if value == 0:
+            raise ValueError('no project')
+        return value
+
+    refresh = BackgroundRefresh(function, results.append, delay=0)
+    refresh.request(0)
+    wait_until(app, lambda: not refresh.running and 'no project' in caplog.text)
+    refresh.request(1)
+    wait_until(app, lambda: results)
+    assert results == [1]
+
+
+def test_task_runs_every_call_in_order(app):
+    results = []
+    task = BackgroundTask(lambda value: value, results.append)
+    for value in range(5):
+        task.start(value)
+    wait_until(app, lambda: len(results) == 5)
+    assert results == list(range(5))
+
+
+def test_list_model_fetches_pages_in_background(app):
+    pytest.importorskip('pydetecdiv')
+    from result_db_example.gui import ResultsListModel
+
+    data = [(i, f'result {i}') for i in range(1, 8)]
+    threads = []
+
+    def fetcher(after_id, limit):
+        threads.append(threading.get_ident())
+        return [row for row in data if after_id is None or row[0] > after_id][:limit]
+
+    model = ResultsListModel(page_size=3)
+    assert not model.canFetchMore()
+    model.set_fetcher(fetcher, data[:3])
+    while model.canFetchMore() or model.fetching:
+        if model.canFetchMore():
+            model.fetchMore()
+        app.processEvents()
+    assert model.rows == data and model.rowCount() == 7
+    assert model.data(model.index(4)) == 'result 5'
+    assert threading.get_ident() not in threads
+
+    model.set_fetcher(fetcher)
+    model.fetchMore()
+    model.set_fetcher(None)
+    wait_until(app, lambda: QtCore.QThreadPool.globalInstance().activeThreadCount() == 0)
+    app.processEvents()
+    assert model.rows == [] and not model.canFetchMore()
@@ -0,0 +1,79 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from roi_classification.batch import extract_roi_batch
+from roi_classification.cache import FrameCache, stack_crops
+
+
+class ParentPlugin:
+    """
+    Crops ROIs from synthetic uint16 RGB frames whose pixel values encode the frame and position
+    """
+
+    def __init__(self):
+        self.calls = 0
+
+    def get_rgb_images_from_stacks(self, imgdata, roi_list, t):
+        self.calls += 1
+        frame = np.arange(32 * 32 * 3, dtype=np.uint16).reshape(32, 32, 3) + 1000 * t + imgdata
+        return [frame[roi.y:roi.y + roi.height, roi.x:roi.x + roi.width] for roi in roi_list]
+
+
+def fov(id_):
+    return SimpleNamespace(id_=id_, image_resource=lambda: SimpleNamespace(image_resource_data=lambda: id_))
+
+
+def roi(id_, x, y, width, height):
+    return SimpleNamespace(id_=id_, x=x, y=y, width=width, height=height)
+
+
+def setup():
+    rois = [roi(1, 0, 0, 4, 5), roi(2, 10, 3, 6, 4), roi(3, 2, 2, 6, 5)]
+    fov_rois = {10: (fov(10), [rois[0], rois[2]]), 20: (fov(20), [rois[1]])}
+    return ParentPlugin(), fov_rois, rois
+
+
+def test_extract_roi_batch_padding_and_dtype():
+    plugin, fov_rois, rois = setup()
+    order = [rois[1], rois[0], rois[2]]
+    batch = extract_roi_batch(plugin, fov_rois, order, range(2, 5), FrameCache())
+    assert batch.shape == (3, 3, 5, 6, 3)
+    assert batch.dtype == np.uint16
+    for i, r in enumerate(order):
+        imgdata = 10 if r.id_ in (1, 3) else 20
+        for j, t in enumerate(range(2, 5)):
+            expected = plugin.get_rgb_images_from_stacks(imgdata, [r], t)[0]
+            np.testing.assert_array_equal(batch[i, j, :r.height, :r.width], expected)
+            assert not batch[i, j, r.height:].any() and not batch[i, j, :, r.width:].any()
+
+
+def test_extract_roi_batch_uses_cache():
+    plugin, fov_rois, rois = setup()
+    cache = FrameCache()
+    first = extract_roi_batch(plugin, fov_rois, rois, [0, 1], cache)
+    assert plugin.calls == 4
+    second = extract_roi_batch(plugin, fov_rois, rois, [1, 0], cache)
+    assert plugin.calls == 4
+    np.testing.assert_array_equal(second, first[:, ::-1])
+
+
+def test_extract_roi_batch_subset_of_rois():
+    plugin, fov_rois, rois = setup()
+    batch = extract_roi_batch(plugin, fov_rois, [rois[2]], [0], FrameCache())
+    assert batch.shape == (1, 1, 5, 6, 3)
+    np.testing.assert_array_equal(batch[0, 0], plugin.get_rgb_images_from_stacks(10, [rois[2]], 0)[0])
+
+
+def test_extract_roi_batch_empty():
+    plugin, fov_rois, rois = setup()
+    assert extract_roi_batch(plugin, {}, [], range(3), FrameCache()).shape == (0, 3, 0, 0, 1)
+    assert extract_roi_batch(plugin, fov_rois, rois, [], FrameCache()).shape == (3, 0, 0, 0, 1)
+    assert plugin.calls == 0
+
+
+def test_stack_crops():
+    stacked = stack_crops([np.ones((2, 3), dtype=np.uint8), np.full((3, 2, 1), 2, dtype=np.uint16)])
+    assert stacked.shape == (2, 3, 3, 1) and stacked.dtype == np.uint16
+    assert stacked[0, :2, :3].all() and not stacked[0, 2:].any()
+    assert stack_crops([]).shape == (0, 0, 0, 1)
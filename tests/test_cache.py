@@ -0,0 +1,44 @@
+import threading
+
+import numpy as np
+
+from roi_classification.cache import FrameCache
+
+
+def crops(n_bytes):
+    return np.zeros(n_bytes, dtype=np.uint8)
+
+
+def test_lru_eviction():
+    cache = FrameCache(max_bytes=300)
+    cache.put((1, 0), crops(100))
+    cache.put((1, 1), crops(100))
+    cache.put((1, 2), crops(100))
+    assert cache.get((1, 0)) is not None
+    cache.put((1, 3), crops(100))
+    assert (1, 1) not in cache and (1, 0) in cache
+    assert len(cache) == 3 and cache.nbytes == 300
+    cache.put((1, 4), crops(400))
+    assert (1, 4) not in cache and cache.nbytes == 300
+    cache.put((1, 0), crops(200))
+    assert cache.nbytes == 300 and len(cache) == 2
+
+
+def test_clear_while_filling():
+    cache = FrameCache(max_bytes=1000)
+    stop = threading.Event()
+
+    def fill():
+        t = 0
+        while not stop.is_set():
+            cache.put((0, t % 50), crops(20))
+            cache.get((0, (t * 7) % 50))
+            t += 1
+
+    worker = threading.Thread(target=fill)
+    worker.start()
+    for _ in range(2000):
+        cache.clear()
+    stop.set()
+    worker.join()
+    assert cache.nbytes == sum(cache.get(key).nbytes for key in [(0, t) for t in range(50)] if key in cache)
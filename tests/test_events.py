@@ -0,0 +1,63 @@
+import numpy as np
+
+from roi_classification.events import EventIndex, label_track
+
+SMALL, LARGE, DEAD = 0, 1, 2
+
+
+def one_hot(labels, n_classes=3):
+    return np.eye(n_classes, dtype=np.float32)[labels]
+
+
+def labels():
+    return np.array([[SMALL, SMALL, LARGE, LARGE, SMALL, LARGE, SMALL, SMALL],
+                     [LARGE, LARGE, LARGE, LARGE, LARGE, LARGE, LARGE, LARGE],
+                     [SMALL, LARGE, SMALL, SMALL, DEAD, DEAD, DEAD, DEAD],
+                     [LARGE, DEAD, DEAD, SMALL, DEAD, DEAD, LARGE, SMALL]])
+
+
+def test_label_track():
+    predictions = one_hot(labels()) * 0.8 + 0.05
+    track = label_track(predictions, chunk_size=3)
+    assert track.dtype == np.int16
+    np.testing.assert_array_equal(track, labels())
+
+
+def test_transitions():
+    index = EventIndex(labels(), t=10)
+    rois, frames = index.transitions(LARGE, SMALL)
+    np.testing.assert_array_equal(rois, [0, 0, 2, 3])
+    np.testing.assert_array_equal(frames, [14, 16, 12, 17])
+    rois, frames = index.transitions(to_label=DEAD)
+    np.testing.assert_array_equal(rois, [2, 3, 3])
+    np.testing.assert_array_equal(frames, [14, 11, 14])
+    assert index.count(LARGE, SMALL) == 4
+    assert index.count(to_label=DEAD) == 3
+    assert index.count(DEAD, LARGE) == 1
+    assert index.count(SMALL, SMALL) == 0
+    assert index.count() == len(index.transition_roi) == 12
+    np.testing.assert_array_equal(index.count_per_roi(LARGE, SMALL), [2, 0, 1, 1])
+    assert len(index.transitions(LARGE, LARGE)[0]) == 0
+
+
+def test_transitions_match_brute_force():
+    track = np.random.default_rng(0).integers(0, 3, (50, 40))
+    index = EventIndex(track)
+    for previous in range(3):
+        for following in range(3):
+            expected = np.nonzero((track[:, :-1] == previous) & (track[:, 1:] == following) & (previous != following))
+            rois, frames = index.transitions(previous, following)
+            np.testing.assert_array_equal(rois, expected[0])
+            np.testing.assert_array_equal(frames, expected[1] + 1)
+
+
+def test_segments():
+    index = EventIndex.from_predictions(one_hot(labels()), t=5)
+    starts, lengths, classes = index.segments(2)
+    np.testing.assert_array_equal(starts, [5, 6, 7, 9])
+    np.testing.assert_array_equal(lengths, [1, 1, 2, 4])
+    np.testing.assert_array_equal(classes, [SMALL, LARGE, SMALL, DEAD])
+    starts, lengths, classes = index.segments(1)
+    np.testing.assert_array_equal(starts, [5])
+    np.testing.assert_array_equal(lengths, [8])
+    assert index.segment_length.sum() == labels().size
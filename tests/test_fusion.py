@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from viewer_examples.fusion import channel_scale, fuse_channels, fuse_stack
+
+WEIGHTS = [[1, 0, 0.5], [0, 1, 0.5], [0, 0, 0]]
+
+
+def reference(channels, weights, dtype=np.float32):
+    scaled = [None if c is None else c.astype(np.float64) * channel_scale(c.dtype) for c in channels]
+    shape = next(c.shape for c in channels if c is not None)
+    rgb = np.stack([sum((w * c for c, w in zip(scaled, row) if c is not None), np.zeros(shape)) for row in weights],
+                   axis=-1)
+    rgb = np.clip(rgb, 0, 1)
+    if np.issubdtype(dtype, np.integer):
+        return np.rint(rgb * np.iinfo(dtype).max).astype(dtype)
+    return rgb.astype(dtype)
+
+
+def channels(shape, seed=0):
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 65536, shape, dtype=np.uint16), rng.integers(0, 256, shape, dtype=np.uint8),
+            rng.random(shape, dtype=np.float32)]
+
+
+def test_channel_scale():
+    assert channel_scale(np.uint8) == 1 / 255
+    assert channel_scale(np.uint16) == 1 / 65535
+    assert channel_scale(np.float32) == 1.0
+
+
+def test_weights_and_clipping():
+    data = channels((5, 7))
+    rgb = fuse_channels(data, WEIGHTS)
+    assert rgb.shape == (5, 7, 3) and rgb.dtype == np.float32
+    np.testing.assert_allclose(rgb, reference(data, WEIGHTS), atol=1e-6)
+    assert rgb[..., :2].max() <= 1 and (rgb[..., 2] == 0).all()
+    negative = fuse_channels(data, [[-1, 0, 0], [0, 0, 0], [0, 0, 0]])
+    assert (negative == 0).all()
+
+
+def test_absent_channels():
+    data = channels((5, 7))
+    rgb = fuse_channels([data[0], None, data[2]], WEIGHTS)
+    np.testing.assert_allclose(rgb, reference([data[0], None, data[2]], WEIGHTS), atol=1e-6)
+    np.testing.assert_array_equal(rgb[..., 1], np.clip(data[2] * 0.5, 0, 1))
+    with pytest.raises(ValueError):
+        fuse_channels([data[0], np.zeros((2, 2))], [[1, 1]])
+
+
+def test_uint8_output():
+    data = channels((5, 7))
+    out = np.full((5, 7, 3), 7, dtype=np.uint8)
+    rgb = fuse_channels(data, WEIGHTS, out=out)
+    assert rgb is out
+    np.testing.assert_allclose(rgb.astype(int), reference(data, WEIGHTS, np.uint8).astype(int), atol=1)
+    assert (rgb[..., 2] == 0).all()
+    assert fuse_channels(data, WEIGHTS, dtype=np.uint8).dtype == np.uint8
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 4, 10, 20])
+@pytest.mark.parametrize('dtype', [np.float32, np.uint8])
+def test_stack_chunks(chunk_size, dtype):
+    data = channels((10, 4, 6), seed=1)
+    data[1] = None
+    np.testing.assert_array_equal(fuse_stack(data, WEIGHTS, dtype=dtype, chunk_size=chunk_size),
+                                  fuse_channels(data, WEIGHTS, dtype=dtype))
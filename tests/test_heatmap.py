@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from matplotlib.figure import Figure
+
+from roi_classification.heatmap import compose_heatmap, downsample_time, draw_heatmap, page_slice
+
+
+def predictions(shape=(4, 10, 3)):
+    return np.random.default_rng(0).random(shape, dtype=np.float32)
+
+
+def test_page_slice_covers_all_rows():
+    slices = [page_slice(page, 100, 250) for page in range(3)]
+    assert [n_pages for _, n_pages in slices] == [3, 3, 3]
+    assert [(rois.start, rois.stop) for rois, _ in slices] == [(0, 100), (100, 200), (200, 250)]
+    assert page_slice(7, 100, 250)[0] == slice(200, 250)
+    assert page_slice(0, 100, 0) == (slice(0, 0), 1)
+
+
+def test_downsample_time():
+    scores = predictions()
+    assert downsample_time(scores, 10)[0] is scores
+    maximum, factor = downsample_time(scores, 4, 'max')
+    assert factor == 3 and maximum.shape == (4, 4, 3)
+    np.testing.assert_array_equal(maximum[:, 0], scores[:, :3].max(axis=1))
+    np.testing.assert_array_equal(maximum[:, 3], scores[:, 9])
+    minimum, _ = downsample_time(scores, 4, 'min')
+    np.testing.assert_array_equal(minimum[:, 1], scores[:, 3:6].min(axis=1))
+    best, _ = downsample_time(scores, 4, 'argmax')
+    np.testing.assert_array_equal(best[:, 0].argmax(axis=-1), scores[:, :3].mean(axis=1).argmax(axis=-1))
+    np.testing.assert_array_equal(best.sum(axis=-1), 1)
+    with pytest.raises(ValueError):
+        downsample_time(scores, 4, 'mean')
+
+
+def test_compose_heatmap():
+    scores = predictions()
+    heatmap = compose_heatmap(scores)
+    assert heatmap.shape == (12, 10)
+    np.testing.assert_array_equal(heatmap[3 * 1 + 2], scores[1, :, 2])
+    np.testing.assert_array_equal(compose_heatmap(scores, mode='argmax'), scores.argmax(axis=-1))
+    with pytest.raises(ValueError):
+        compose_heatmap(scores, mode='other')
+
+
+@pytest.mark.parametrize('mode', ['scores', 'argmax'])
+def test_draw_heatmap(mode):
+    ax = Figure().add_subplot()
+    draw_heatmap(ax, predictions(), ['a', 'b', 'c', 'd'], ['empty', 'small', 'large'], t=5, mode=mode,
+                 max_columns=4)
+    assert [label.get_text() for label in ax.get_yticklabels()] == ['a', 'b', 'c', 'd']
+    assert ax.images[0].get_array().shape == ((12 if mode == 'scores' else 4), 4)
+    assert ax.get_xlim() == (4.5, 14.5)
+    assert ax.get_xlabel() == 'frame (max over 3 frames)'
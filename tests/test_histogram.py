@@ -0,0 +1,53 @@
+import numpy as np
+
+from viewer_examples.histogram import Histogram, default_chunk_size, default_range, running_histograms
+
+
+def twelve_bit_image():
+    return np.random.default_rng(0).integers(0, 4096, (256, 256), dtype=np.uint16) // 4 + 500
+
+
+def test_integer_images_are_binned_over_their_values():
+    image = twelve_bit_image()
+    assert default_range(image) == (image.min(), image.max() + 1)
+    histogram = Histogram.compute(image, bins=64)
+    assert (histogram.counts > 0).all()
+    assert histogram.counts.sum() == image.size
+
+
+def test_quantile_within_bin_width():
+    image = twelve_bit_image()
+    histogram = Histogram.compute(image, bins=64)
+    width = histogram.edges[1] - histogram.edges[0]
+    for q in [0.02, 0.5, 0.98]:
+        assert abs(histogram.quantile(q)[0] - np.quantile(image, q)) < width / 2
+
+
+def test_equalize_is_not_a_step_function():
+    image = twelve_bit_image()
+    equalized = Histogram.compute(image, bins=64).equalize(image)
+    assert len(np.unique(equalized)) > 64
+    assert 0 <= equalized.min() and equalized.max() <= 1
+    np.testing.assert_allclose(np.quantile(equalized, [0.25, 0.5, 0.75]), [0.25, 0.5, 0.75], atol=0.02)
+
+
+def test_multichannel_histograms():
+    image = np.stack([np.full((4, 4), 1.0), np.full((4, 4), 0.0), np.linspace(0, 1, 16).reshape(4, 4)], axis=-1)
+    histogram = Histogram.compute(image, bins=4, value_range=(0, 1))
+    np.testing.assert_array_equal(histogram.counts, [[0, 0, 0, 16], [16, 0, 0, 0], [4, 4, 4, 4]])
+
+
+def test_running_histograms():
+    stack = np.stack([twelve_bit_image()] * 3)
+    counts, edges = running_histograms(stack, bins=64, chunk_size=2)
+    assert counts.shape == (3, 1, 64)
+    np.testing.assert_array_equal(counts[1, 0], Histogram.compute(stack[1], bins=64, value_range=default_range(stack))
+                                  .counts[0])
+
+
+def test_default_chunk_size():
+    assert default_chunk_size((2048, 2048)) == 2
+    assert default_chunk_size((8192, 8192, 3)) == 1
+    stack = np.stack([twelve_bit_image()] * 5)
+    counts, _ = running_histograms(stack, bins=16)
+    np.testing.assert_array_equal(counts, running_histograms(stack, bins=16, chunk_size=2)[0])
@@ -0,0 +1,107 @@
+import json
+import threading
+
+import pytest
+import sqlalchemy
+
+from instrumentation import metrics
+from instrumentation.metrics import action, add, instrumented, timed
+
+
+@pytest.fixture
+def records(monkeypatch):
+    emitted = []
+    monkeypatch.setattr(metrics, 'emit', lambda record, profiler=None: emitted.append(record))
+    return emitted
+
+
+def test_counters(records):
+    add('outside')
+    with action('test.counters', roi=3) as record:
+        add('image_bytes_read', 100)
+        add('image_bytes_read', 20)
+        add('frames')
+        with timed('predict'):
+            pass
+        with timed('predict'):
+            pass
+    assert records == [record]
+    assert record.status == 'ok' and record.wall_seconds >= 0
+    assert record.counters['image_bytes_read'] == 120 and record.counters['frames'] == 1
+    assert record.counters['predict_calls'] == 2 and record.counters['predict_seconds'] >= 0
+    assert 'outside' not in record.counters
+    data = record.as_dict()
+    assert data['action'] == 'test.counters' and data['roi'] == 3 and data['frames'] == 1
+
+
+def test_nesting(records):
+    with action('outer') as outer:
+        add('count')
+        with action('inner') as inner:
+            add('count', 2)
+        add('count', 4)
+    assert [record.name for record in records] == ['inner', 'outer']
+    assert inner.counters == {'count': 2}
+    assert outer.counters == {'count': 7}
+
+
+def test_instrumented_and_errors(records):
+    @instrumented('test.fails')
+    def fails():
+        add('calls')
+        raise ValueError()
+
+    @instrumented()
+    def succeeds(value):
+        return value
+
+    assert succeeds(5) == 5
+    with pytest.raises(ValueError):
+        fails()
+    assert [(record.name, record.status) for record in records] == [
+        ('test_instrumented_and_errors.<locals>.succeeds', 'ok'), ('test.fails', 'error')]
+    assert records[1].counters == {'calls': 1}
+
+
+def test_threads_are_isolated(records):
+    def work():
+        with action('worker'):
+            add('worker_count')
+
+    with action('main') as main:
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+    assert 'worker_count' not in main.counters
+    assert records[0].counters == {'worker_count': 1}
+
+
+def test_database_queries(records):
+    engine = sqlalchemy.create_engine('sqlite://')
+    with engine.connect() as connection:
+        connection.execute(sqlalchemy.text('select 1'))
+        with action('test.queries') as record:
+            for _ in range(3):
+                connection.execute(sqlalchemy.text('select 1'))
+    assert record.counters['db_queries'] == 3
+    assert record.counters['db_query_seconds'] >= 0
+
+
+def test_metrics_file(tmp_path, monkeypatch):
+    monkeypatch.setitem(metrics.settings, 'metrics_file', str(tmp_path / 'metrics.jsonl'))
+    with action('test.file', fov='Pos0'):
+        add('frames', 2)
+    with action('test.file'):
+        pass
+    lines = [json.loads(line) for line in (tmp_path / 'metrics.jsonl').read_text().splitlines()]
+    assert [line['action'] for line in lines] == ['test.file', 'test.file']
+    assert lines[0]['fov'] == 'Pos0' and lines[0]['frames'] == 2 and lines[0]['status'] == 'ok'
+
+
+def test_profiling(tmp_path, monkeypatch):
+    monkeypatch.setitem(metrics.settings, 'profile_dir', str(tmp_path / 'profiles'))
+    with action('outer'):
+        with action('inner'):
+            pass
+    profiles = list((tmp_path / 'profiles').iterdir())
+    assert len(profiles) == 1 and profiles[0].name.startswith('outer-') and profiles[0].suffix == '.prof'
@@ -0,0 +1,38 @@
+import numpy as np
+from matplotlib.figure import Figure
+
+from roi_classification.mosaic import build_mosaic, class_colours, draw_mosaic
+
+
+def test_build_mosaic_uint16():
+    batch = np.random.default_rng(0).integers(0, 65536, (3, 4, 5, 6, 1), dtype=np.uint16)
+    labels = np.arange(12).reshape(3, 4) % 2
+    colours = np.array([[1, 0, 0], [0, 0.5, 1]], dtype=np.float32)
+    canvas, (cell_height, cell_width) = build_mosaic(batch, labels=labels, colours=colours, padding=2, band=3)
+    assert canvas.dtype == np.uint8
+    assert canvas.shape == (3 * 10, 4 * 8, 3) and (cell_height, cell_width) == (10, 8)
+    expected = np.rint(batch[1, 2, ..., 0] * (255 / 65535)).astype(np.uint8)
+    for c in range(3):
+        np.testing.assert_array_equal(canvas[10:15, 16:22, c], expected)
+    np.testing.assert_array_equal(canvas[15:18, 16:22], np.broadcast_to([255, 0, 0], (3, 6, 3)))
+    np.testing.assert_array_equal(canvas[15:18, 24:30], np.broadcast_to([0, 128, 255], (3, 6, 3)))
+    assert (canvas[18:20] == 255).all()
+
+
+def test_build_mosaic_float_and_uint8():
+    floats = np.random.default_rng(0).uniform(-0.5, 1.5, (2, 3, 4, 4, 3)).astype(np.float32)
+    canvas, _ = build_mosaic(floats, padding=0)
+    np.testing.assert_array_equal(canvas[:4, 4:8], np.rint(np.clip(floats[0, 1], 0, 1) * 255).astype(np.uint8))
+    uint8 = (floats.clip(0, 1) * 255).astype(np.uint8)
+    canvas, _ = build_mosaic(uint8, padding=0)
+    np.testing.assert_array_equal(canvas[4:8, 8:12], uint8[1, 2])
+
+
+def test_draw_mosaic():
+    batch = np.zeros((60, 2, 4, 4, 1), dtype=np.uint8)
+    ax = Figure().add_subplot()
+    draw_mosaic(ax, batch, np.zeros((60, 2), dtype=int), [f'roi{i}' for i in range(60)], [10, 11],
+                ['empty', 'small'], max_tick_labels=50)
+    assert len(ax.get_yticks()) == 30
+    assert [label.get_text() for label in ax.get_xticklabels()] == ['10', '11']
+    assert class_colours(12).shape == (12, 3)
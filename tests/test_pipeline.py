@@ -0,0 +1,45 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+import pytest
+
+from viewer_examples.pipeline import PipelineResults
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        yield executor
+
+
+def results(executor, n=3):
+    blocks = [shared_memory.SharedMemory(create=True, size=16) for _ in range(n)]
+    futures = {executor.submit(time.sleep, 0.05 * i): (i, block, (4,)) for i, block in enumerate(blocks)}
+    return PipelineResults(futures, blocks), [block.name for block in blocks]
+
+
+def released(names):
+    return not any(os.path.exists(f'/dev/shm/{name}') for name in names)
+
+
+def test_context_manager_releases_unconsumed_results(executor):
+    with results(executor)[0] as pending:
+        names = [block.name for block in pending._blocks]
+    assert pending.done and released(names)
+
+
+def test_poll(executor):
+    pending, names = results(executor)
+    keys = []
+    while not pending.done:
+        keys += [key for key, _ in pending.ready()]
+        time.sleep(0.01)
+    assert sorted(keys) == [0, 1, 2] and released(names)
+
+
+def test_iterate(executor):
+    pending, names = results(executor)
+    assert sorted(key for key, _ in pending) == [0, 1, 2]
+    assert released(names)
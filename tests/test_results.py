@@ -0,0 +1,103 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+import sqlalchemy
+from sqlalchemy.orm import Session
+
+from roi_classification.results import prediction_results, roi_table
+from roi_classification.store import fingerprint
+
+
+@pytest.fixture
+def project(tmp_path):
+    engine = sqlalchemy.create_engine(f'sqlite:///{tmp_path / "project.db"}')
+    roi_table.metadata.create_all(engine, tables=[roi_table])
+    session = Session(engine)
+    session.execute(sqlalchemy.insert(roi_table), [{'id_': id_} for id_ in range(1, 11)])
+    session.commit()
+    yield SimpleNamespace(repository=SimpleNamespace(engine=engine, session=session), commit=session.commit)
+    session.close()
+    engine.dispose()
+
+
+def predictions(seed, shape=(4, 6, 3)):
+    return np.random.default_rng(seed).random(shape, dtype=np.float32)
+
+
+def test_save_and_load(project):
+    scores = predictions(0)
+    prediction_results.save(project, [3, 1, 2, 4], scores, t=2, chunk_size=3)
+    assert prediction_results.count(project) == 24
+    roi_ids, t, labels, best = prediction_results.load(project)
+    np.testing.assert_array_equal(roi_ids, [1, 2, 3, 4])
+    assert t == 2
+    order = [1, 2, 0, 3]
+    np.testing.assert_array_equal(labels, scores.argmax(axis=-1)[order])
+    np.testing.assert_array_equal(best, scores.max(axis=-1)[order])
+    roi_ids, t, dense = prediction_results.load_scores(project, 3)
+    np.testing.assert_array_equal(dense, scores[order])
+    np.testing.assert_array_equal(prediction_results.frames_with_label(project, 3, int(scores[0, 0].argmax())),
+                                  np.flatnonzero(scores[0].argmax(axis=-1) == scores[0, 0].argmax()) + 2)
+
+
+def test_save_without_score_vectors(project):
+    scores = predictions(0)
+    prediction_results.save(project, [1, 2, 3, 4], scores, keep_scores=False)
+    _, _, dense = prediction_results.load_scores(project, 3)
+    np.testing.assert_array_equal(dense.argmax(axis=-1), scores.argmax(axis=-1))
+    np.testing.assert_array_equal(dense.max(axis=-1), scores.max(axis=-1))
+
+
+def test_iter_scores(project):
+    scores = predictions(0)
+    prediction_results.save(project, [1, 2, 3, 4], scores, t=1)
+    prediction_results.save(project, [5], predictions(1, (1, 2, 3)), t=4)
+    assert prediction_results.frame_range(project) == (1, 6)
+    chunks = list(prediction_results.iter_scores(project, 3, chunk_size=2))
+    assert [start for start, _, _ in chunks] == [0, 2, 4]
+    dense = np.concatenate([chunk for _, _, chunk in chunks])
+    assert dense.shape == (5, 6, 3)
+    np.testing.assert_array_equal(dense[:4], scores)
+    np.testing.assert_array_equal(dense[4, :3], 0)
+
+
+def test_rerun_is_not_saved(project):
+    first, second = predictions(0), predictions(1)
+    assert not prediction_results.is_saved(project, [1, 2, 3, 4], fingerprint(first))
+    prediction_results.save(project, [1, 2, 3, 4], first, source=fingerprint(first))
+    assert prediction_results.is_saved(project, [1, 2, 3, 4], fingerprint(first))
+    assert not prediction_results.is_saved(project, [1, 2, 3, 4, 5], fingerprint(first))
+    assert not prediction_results.is_saved(project, [1, 2, 3, 4], fingerprint(second))
+    prediction_results.save(project, [1, 2, 3, 4], second, source=fingerprint(second))
+    assert prediction_results.is_saved(project, [1, 2, 3, 4], fingerprint(second))
+    assert prediction_results.source(project) == fingerprint(second)
+    assert prediction_results.count(project) == 24
+    _, _, dense = prediction_results.load_scores(project, 3)
+    np.testing.assert_array_equal(dense, second)
+
+
+def test_missing_table(project):
+    assert prediction_results.count(project) == 0
+    assert len(prediction_results.roi_ids(project)) == 0
+    assert prediction_results.frame_range(project) == (0, -1)
+    assert prediction_results.source(project) is None
+    assert list(prediction_results.iter_scores(project, 3)) == []
+
+
+def test_shorter_rerun_replaces_all_frames(project):
+    first, second = predictions(0, (4, 6, 3)), predictions(1, (4, 4, 3))
+    prediction_results.save(project, [1, 2, 3, 4], first, source=fingerprint(first))
+    prediction_results.save(project, [1, 2, 3, 4], second, source=fingerprint(second))
+    assert prediction_results.is_saved(project, [1, 2, 3, 4], fingerprint(second))
+    assert prediction_results.frame_range(project) == (0, 3)
+    assert prediction_results.count(project) == 16
+    _, _, dense = prediction_results.load_scores(project, 3)
+    np.testing.assert_array_equal(dense, second)
+
+
+def test_partial_save_without_source_keeps_other_frames(project):
+    scores = predictions(0, (2, 6, 3))
+    prediction_results.save(project, [1, 2], scores)
+    prediction_results.save(project, [1, 2], scores[:, 2:4], t=2)
+    assert prediction_results.count(project) == 12
@@ -0,0 +1,62 @@
+from types import SimpleNamespace
+
+import pytest
+import sqlalchemy
+from sqlalchemy import Column, ForeignKey, Integer, MetaData, String, Table
+from sqlalchemy.orm import Session
+
+from result_db_example import Results, results_store
+
+project_metadata = MetaData()
+fov = Table('FOV', project_metadata, Column('id_', Integer, primary_key=True), Column('name', String))
+roi = Table('ROI', project_metadata, Column('id_', Integer, primary_key=True), Column('fov', ForeignKey('FOV.id_')))
+
+
+@pytest.fixture
+def project(tmp_path):
+    engine = sqlalchemy.create_engine(f'sqlite:///{tmp_path / "project.db"}')
+    project_metadata.create_all(engine)
+    Table('FOV', Results.metadata, autoload_with=engine, extend_existing=True)
+    session = Session(engine)
+    session.execute(sqlalchemy.insert(fov), [{'id_': 1, 'name': 'Pos1'}, {'id_': 2, 'name': 'Pos0'},
+                                             {'id_': 3, 'name': 'Pos2'}])
+    session.execute(sqlalchemy.insert(roi), [{'id_': i, 'fov': 1 if i <= 3 else 2} for i in range(1, 6)])
+    session.commit()
+    yield SimpleNamespace(repository=SimpleNamespace(engine=engine, session=session), commit=session.commit)
+    session.close()
+    engine.dispose()
+
+
+def test_fov_names(project):
+    assert results_store.fov_names(project) == ['Pos0', 'Pos1', 'Pos2']
+
+
+def test_missing_table(project):
+    assert not results_store.has_table(project.repository.engine)
+    assert results_store.list_with_roi_counts(project) == []
+
+
+def test_insert_and_list(project):
+    results_store.insert(project, [])
+    assert results_store.has_table(project.repository.engine)
+    assert results_store.list_with_roi_counts(project) == []
+    results_store.insert(project, [{'name': 'Pos1', 'fov': 1}, {'name': 'Pos0', 'fov': 2},
+                                   {'name': 'Pos2', 'fov': 3}, {'name': 'none', 'fov': None}])
+    results_store.insert(project, [{'name': 'Pos1', 'fov': 1}])
+    assert [tuple(row) for row in results_store.list_with_roi_counts(project)] == [
+        (1, 'Pos1', 3), (2, 'Pos0', 2), (3, 'Pos2', 0), (4, None, 0), (5, 'Pos1', 3)]
+
+
+def test_keyset_pages(project):
+    results_store.insert(project, [{'name': f'result {i}', 'fov': i % 3 + 1} for i in range(7)])
+    rows = [tuple(row) for row in results_store.list_with_roi_counts(project)]
+    pages, after_id = [], None
+    while True:
+        page = results_store.list_with_roi_counts(project, after_id=after_id, limit=3)
+        if not page:
+            break
+        pages.append([tuple(row) for row in page])
+        after_id = page[-1][0]
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert sum(pages, []) == rows
+    assert results_store.list_with_roi_counts(project, after_id=rows[-1][0]) == []
@@ -0,0 +1,94 @@
+import numpy as np
+
+from roi_classification.store import PredictionStore, fingerprint
+
+
+def predictions(seed, shape=(5, 7, 3)):
+    return np.random.default_rng(seed).random(shape, dtype=np.float32)
+
+
+def test_write_from_and_reopen(tmp_path):
+    path = str(tmp_path / 'store')
+    scores = predictions(0)
+    store = PredictionStore.create(path, [10, 11, 12, 13, 14], 7, 3, source=fingerprint(scores))
+    store.write_from(scores, chunk_size=2)
+    assert store.complete
+    del store
+    store = PredictionStore(path)
+    np.testing.assert_array_equal(store.view(), scores)
+    np.testing.assert_array_equal(store.roi_ids, [10, 11, 12, 13, 14])
+    np.testing.assert_array_equal(store.view(slice(1, 3), t=2, length=3), scores[1:3, 2:5])
+
+
+def test_resume_same_source(tmp_path):
+    path = str(tmp_path / 'store')
+    scores = predictions(0)
+    store = PredictionStore.create(path, range(5), 7, 3, source=fingerprint(scores))
+    store.write(slice(0, 2), slice(None), scores[:2])
+    store.flush()
+    del store
+    store = PredictionStore.create(path, range(5), 7, 3, source=fingerprint(scores))
+    assert store.done[:2].all() and not store.done[2:].any()
+    store.write_from(scores, chunk_size=2)
+    np.testing.assert_array_equal(store.view(), scores)
+
+
+def test_rerun_replaces_predictions(tmp_path):
+    path = str(tmp_path / 'store')
+    first, second = predictions(0), predictions(1)
+    store = PredictionStore.create(path, range(5), 7, 3, source=fingerprint(first))
+    store.write_from(first)
+    del store
+    store = PredictionStore.create(path, range(5), 7, 3, source=fingerprint(second))
+    assert not store.done.any()
+    store.write_from(second)
+    np.testing.assert_array_equal(store.view(), second)
+    assert store.source == fingerprint(second)
+
+
+def test_unknown_source_is_not_resumed(tmp_path):
+    path = str(tmp_path / 'store')
+    store = PredictionStore.create(path, range(5), 7, 3)
+    store.write_from(predictions(0))
+    del store
+    store = PredictionStore.create(path, range(5), 7, 3)
+    assert not store.done.any()
+
+
+def test_other_rois_recreate_store(tmp_path):
+    path = str(tmp_path / 'store')
+    PredictionStore.create(path, range(5), 7, 3).write_from(predictions(0))
+    store = PredictionStore.create(path, range(4), 7, 3)
+    assert store.shape == (4, 7, 3)
+    assert not store.done.any()
+
+
+def test_fingerprint():
+    scores = predictions(0)
+    assert fingerprint(scores) == fingerprint(scores.copy())
+    assert fingerprint(scores, chunk_size=2) == fingerprint(scores, chunk_size=3)
+    assert fingerprint(scores) != fingerprint(predictions(1))
+    assert fingerprint(scores) != fingerprint(scores.reshape(7, 5, 3))
+
+
+def test_interrupted_write_is_incomplete(tmp_path):
+    path = str(tmp_path / 'store')
+    scores = predictions(0)
+    store = PredictionStore.create(path, range(5), 7, 3, source=fingerprint(scores))
+
+    def interrupt(done, total):
+        if done < total:
+            raise KeyboardInterrupt
+
+    try:
+        store.write_from(scores, chunk_size=2, progress=interrupt)
+    except KeyboardInterrupt:
+        pass
+    del store
+    assert not PredictionStore(path).complete
+    store = PredictionStore.create(path, range(5), 7, 3, source=fingerprint(scores))
+    reported = []
+    store.write_from(scores, chunk_size=2, progress=lambda done, total: reported.append((done, total)))
+    assert store.complete
+    assert reported == [(2, 5), (4, 5), (5, 5)]
+    np.testing.assert_array_equal(store.view(), scores)
@@ -0,0 +1,79 @@
+"""
+Report the startup cost of each plugin package in this repository: the time needed to import it and its plugin class
+and the memory used once they are imported, on top of what PyDetecDiv itself already loads. Each plugin is imported in
+a fresh interpreter so that measures are independent. Usage, from the repository root:
+
+    python tools/plugin_import_times.py [plugin ...]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ['tensorflow', 'pandas', 'tifffile', 'matplotlib', 'skimage']
+
+PROBE = f'''
+import importlib, json, resource, sys, time
+import pydetecdiv.app, pydetecdiv.plugins
+preloaded = set(sys.modules)
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+importlib.import_module(sys.argv[1]).Plugin
+print(json.dumps({{
+    'seconds': time.perf_counter() - start,
+    'rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss,
+    'heavy_modules': [m for m in {HEAVY_MODULES!r} if m in sys.modules and m not in preloaded],
+}}))
+'''
+
+
+def plugin_packages():
+    """
+    List the plugin packages of the repository, i.e. the top-level directories with an __init__.py file
+
+    :return: the package names
+    :rtype: list of str
+    """
+    return sorted(name for name in os.listdir(ROOT) if os.path.isfile(os.path.join(ROOT, name, '__init__.py')))
+
+
+def measure(package):
+    """
+    Measure the import of a plugin package in a fresh interpreter
+
+    :param package: the package name
+    :type package: str
+    :return: the import time in seconds, the increase of the resident set size in kB and the heavy modules imported
+    :rtype: dict
+    """
+    result = subprocess.run([sys.executable, '-c', PROBE, package], cwd=ROOT, capture_output=True, text=True,
+                            check=False)
+    if result.returncode:
+        return {'error': result.stderr.strip().splitlines()[-1]}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('plugins', nargs='*', help='the plugins to measure, all plugins by default')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args()
+
+    report = {package: measure(package) for package in args.plugins or plugin_packages()}
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f'{"plugin":<24}{"import (s)":>12}{"RSS (MB)":>12}  heavy modules')
+    for package, measures in report.items():
+        if 'error' in measures:
+            print(f'{package:<24}  {measures["error"]}')
+        else:
+            print(f'{package:<24}{measures["seconds"]:>12.3f}{measures["rss_kb"] / 1024:>12.1f}  '
+                  f'{", ".join(measures["heavy_modules"]) or "-"}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""
+Implementation of the demo plots of the viewer add-ons plugin. This module imports heavy dependencies (TensorFlow,
+pandas) and is therefore only imported when a demo action is triggered.
+"""
+import logging
+
+import pandas
+import numpy as np
+from PySide6.QtCore import QTimer
+
+from pydetecdiv.app import PyDetecDiv
+from pydetecdiv.app.gui.Windows import MatplotViewer
+from pydetecdiv.domain.Image import Image, ImgDType
+from instrumentation.metrics import instrumented
+
+from .fusion import channel_scale, fuse_channels
+from .histogram import Histogram, HistogramCache
+from .pipeline import PreprocessingPipeline
+
+pipeline = PreprocessingPipeline()
+histograms = HistogramCache()
+logger = logging.getLogger(__name__)
+
+
+@instrumented('viewer_examples.add_plot')
+def add_plot():
+    """
+    Add a new tab with a dummy plot to the currently active subwindow
+    """
+    active_subwindow = PyDetecDiv().main_window.mdi_area.activeSubWindow()
+    if active_subwindow:
+        tab = [tab for tab in PyDetecDiv().main_window.tabs.values() if tab.window == active_subwindow][0]
+        x = np.linspace(0, 10, 500)
+        y = np.sin(x)
+        df = pandas.DataFrame(y)
+        tab.show_plot(df, 'Plugin plot')
+
+        images = np.array(
+            ['/NAS/Data/BioImageIT/TestTrainingSet/Grayscale/Pos16_empty_channel00_z00_frame_0000.tif',
+             '/NAS/Data/BioImageIT/TestTrainingSet/Grayscale/Pos16_empty_channel00_z01_frame_0000.tif',
+             '/NAS/Data/BioImageIT/TestTrainingSet/Grayscale/Pos16_empty_channel00_z02_frame_0000.tif',
+             '/NAS/DataGS02/Fred/div_1_first_tests/trainingdataset/images/small/Pos0_1_221_frame_0410.tif',
+             '/NAS/DataGS02/Fred/div_1_first_tests/trainingdataset/images/large/Pos0_1_83_frame_0211.tif',
+             '/NAS/DataGS02/Fred/div_1_first_tests/trainingdataset/images/empty/Pos0_1_47_frame_0018.tif',
+             '/NAS/Data/BioImageIT/TestChannels/img_channel000_position001_time000000284_z001.tif',
+             '/NAS/Data/BioImageIT/TestChannels/img_channel001_position001_time000000284_z001.tif',
+             '/NAS/Data/BioImageIT/TestChannels/img_channel002_position001_time000000284_z001.tif',
+             ])
+
+        arrays = pipeline.read(images[[0, 1, 2, 3, 6, 7, 8]])
+        image1, image2, image3, image_rgb = [Image(array) for array in arrays[:4]]
+
+        # red, green and bright field channels, each output channel being the mean of a fluorescence channel (none for
+        # blue) and the bright field
+        composition = fuse_channels([arrays[5], arrays[6], arrays[4]],
+                                    [[0.5, 0, 0.5], [0, 0.5, 0.5], [0, 0, 0.5]])
+        corrections = pipeline.run({
+            'sigmoid': (arrays[0], 'sigmoid_correction', None),
+            'adaptative': (arrays[0], 'equalize_hist', {'adapt': True}),
+            'fluo': (composition, 'equalize_hist', {'adapt': True}),
+        })
+        try:
+            logger.debug('image1: shape %s, array %s, tensor %s', image1.shape, image1.as_array().dtype,
+                         image1.as_tensor().dtype)
+
+            resized = image1.resize((200, 200), method='nearest')
+            logger.debug('resized: shape %s, %s', resized.shape, resized.dtype)
+
+            comp = Image.compose_channels([image1, image2, image3])
+            logger.debug('composition: shape %s', comp.shape)
+
+            plot_viewer = MatplotViewer(PyDetecDiv().main_window.active_subwindow)
+            PyDetecDiv().main_window.active_subwindow.addTab(plot_viewer, 'Histogram RGB')
+            histograms.get(images[3], arrays[3]).plot(plot_viewer.axes, colors=['red', 'green', 'blue'])
+            plot_viewer.canvas.draw()
+
+            plot_viewer = MatplotViewer(PyDetecDiv().main_window.active_subwindow)
+            PyDetecDiv().main_window.active_subwindow.addTab(plot_viewer, 'Histogram gray scale')
+            image1_histogram = histograms.get(images[0], arrays[0], bins=256)
+            image1_histogram.plot(plot_viewer.axes)
+            plot_viewer.canvas.draw()
+            PyDetecDiv().main_window.active_subwindow.setCurrentWidget(plot_viewer)
+
+            correction_viewer = MatplotViewer(PyDetecDiv().main_window.active_subwindow, columns=2)
+            PyDetecDiv().main_window.active_subwindow.addTab(correction_viewer, 'Histogram image correction')
+            correction_viewer.axes[1].set_title('Equalize histogram')
+            correction_plots = {'stretch': (0, 'blue', 'Strech contrast'),
+                                'sigmoid': (0, 'yellow', 'Sigmoid'),
+                                'plain': (1, 'green', 'plain'),
+                                'adaptative': (1, 'red', 'adaptative'),
+                                }
+            legends = [[], []]
+            for key, corrected in [('stretch', image1_histogram.stretch(arrays[0])),
+                                   ('plain', image1_histogram.equalize(arrays[0]))]:
+                axis, colour, legend = correction_plots[key]
+                Histogram.compute(corrected, value_range=(0, 1)).plot(correction_viewer.axes[axis], colors=[colour])
+                legends[axis].append(legend)
+
+            plot_viewer = MatplotViewer(PyDetecDiv().main_window.active_subwindow, columns=4)
+            PyDetecDiv().main_window.active_subwindow.addTab(plot_viewer, 'Image & channels')
+            plot_viewer.axes[0].imshow(image_rgb.as_array(ImgDType.uint8))
+            colours = ['R', 'G', 'B']
+            for i in range(3):
+                plot_viewer.axes[i + 1].imshow(arrays[3][..., i], cmap='gray', vmin=0,
+                                               vmax=1 / channel_scale(arrays[3].dtype))
+                plot_viewer.axes[i + 1].set_title(colours[i])
+
+            fluo_viewer = MatplotViewer(PyDetecDiv().main_window.active_subwindow, )
+            PyDetecDiv().main_window.active_subwindow.addTab(fluo_viewer, 'Fluorescence')
+
+            plot_viewer = MatplotViewer(PyDetecDiv().main_window.active_subwindow, rows=3, columns=2)
+            PyDetecDiv().main_window.active_subwindow.addTab(plot_viewer, 'Fluorescence histograms')
+            colours = ['red', 'green', 'blue']
+            for i, (path, array) in enumerate([(images[7], arrays[5]), (images[8], arrays[6]), (images[6], arrays[4])]):
+                histograms.get(path, array, bins=64).plot(plot_viewer.axes[i, 0], colors=[colours[i]])
+
+            PyDetecDiv().main_window.active_subwindow.setCurrentWidget(plot_viewer)
+        except Exception:
+            corrections.close()
+            raise
+
+        def show_correction(key, array):
+            if key == 'fluo':
+                fluo_viewer.axes.imshow(np.clip(array, 0, 1, out=array))
+                fluo_viewer.canvas.draw()
+                fluo_histogram = Histogram.compute(array, bins=64, value_range=(0, 1))
+                for i, counts in enumerate(fluo_histogram.counts):
+                    plot_viewer.axes[i, 1].plot(fluo_histogram.centers, counts, color=colours[i])
+                plot_viewer.canvas.draw()
+            else:
+                axis, colour, legend = correction_plots[key]
+                Histogram.compute(array, value_range=(0, 1)).plot(correction_viewer.axes[axis], colors=[colour])
+                legends[axis].append(legend)
+                correction_viewer.axes[axis].legend(legends[axis])
+                correction_viewer.canvas.draw()
+
+        def poll_corrections():
+            try:
+                for key, array in corrections.ready():
+                    show_correction(key, array)
+            except Exception:
+                logger.exception('Image corrections failed')
+                corrections.close()
+            if corrections.done:
+                timer.stop()
+                timer.deleteLater()
+
+        # corrected images are polled rather than waited for, so that the GUI stays responsive while they are computed
+        timer = QTimer(plot_viewer)
+        timer.timeout.connect(poll_corrections)
+        timer.start(50)
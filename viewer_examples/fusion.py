@@ -0,0 +1,100 @@
+"""
+Fusion of image channels into RGB images. Each output channel is a weighted sum of input channels, accumulated in
+float32 scratch planes and written once into a preallocated (..., 3) float32 or uint8 buffer, so that neither
+intermediate channel images nor zero-filled channels are materialized. Time stacks are fused chunk by chunk.
+"""
+import numpy as np
+
+
+def channel_scale(dtype):
+    """
+    Get the factor mapping the values of a data type to [0, 1]: the inverse of the maximum value for integer types, 1
+    for float types
+
+    :param dtype: the data type
+    :type dtype: numpy dtype
+    :return: the factor
+    :rtype: float
+    """
+    dtype = np.dtype(dtype)
+    return 1 / np.iinfo(dtype).max if np.issubdtype(dtype, np.integer) else 1.0
+
+
+def _fusion_shape(channels):
+    shapes = {channel.shape for channel in channels if channel is not None}
+    if len(shapes) != 1:
+        raise ValueError(f'channels must all have the same shape, got {sorted(shapes)}')
+    return shapes.pop()
+
+
+def fuse_channels(channels, weights, out=None, dtype=np.float32, scratch=None):
+    """
+    Fuse channels into an RGB image. Output channel o is the sum over i of weights[o][i] * channels[i], channels being
+    scaled to [0, 1] according to their data type. Channels that are None or whose weight is 0 are skipped. Values are
+    clipped to [0, 1] and converted only once to the output data type, uint8 outputs being scaled to [0, 255].
+
+    :param channels: the channels, arrays of the same shape, e.g. (H, W) or (T, H, W), or None for absent channels
+    :type channels: list of ndarray
+    :param weights: the weights of input channels in each output channel, of shape (3, len(channels))
+    :type weights: array-like
+    :param out: the array receiving the RGB image, of shape channels shape + (3,), allocated if None
+    :type out: ndarray
+    :param dtype: the data type of the allocated output, float32 or uint8
+    :type dtype: numpy dtype
+    :param scratch: a float32 array of shape (2,) + channels shape used to accumulate each output channel, allocated if
+     None
+    :type scratch: ndarray
+    :return: the RGB image
+    :rtype: ndarray
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    shape = _fusion_shape(channels)
+    if out is None:
+        out = np.empty(shape + (weights.shape[0],), dtype=dtype)
+    if scratch is None:
+        scratch = np.empty((2,) + shape, dtype=np.float32)
+    accumulator, term = scratch
+    for o, row in enumerate(weights):
+        terms = [(channel, w * channel_scale(channel.dtype)) for channel, w in zip(channels, row)
+                 if channel is not None and w != 0]
+        if not terms:
+            out[..., o] = 0
+            continue
+        np.multiply(terms[0][0], terms[0][1], out=accumulator, dtype=np.float32)
+        for channel, factor in terms[1:]:
+            accumulator += np.multiply(channel, factor, out=term, dtype=np.float32)
+        np.clip(accumulator, 0, 1, out=accumulator)
+        if np.issubdtype(out.dtype, np.integer):
+            accumulator *= np.iinfo(out.dtype).max
+            np.rint(accumulator, out=accumulator)
+        out[..., o] = accumulator
+    return out
+
+
+def fuse_stack(channels, weights, out=None, dtype=np.float32, chunk_size=4):
+    """
+    Fuse channel time stacks into a stack of RGB images, processing chunk_size frames at a time with one scratch buffer
+    of 2 * chunk_size float32 frames
+
+    :param channels: the channel stacks, arrays of the same (T, H, W) shape, or None for absent channels
+    :type channels: list of ndarray
+    :param weights: the weights of input channels in each output channel, of shape (3, len(channels))
+    :type weights: array-like
+    :param out: the array receiving the RGB images, of shape (T, H, W, 3), allocated if None
+    :type out: ndarray
+    :param dtype: the data type of the allocated output, float32 or uint8
+    :type dtype: numpy dtype
+    :param chunk_size: the number of frames fused at once
+    :type chunk_size: int
+    :return: the RGB images
+    :rtype: ndarray
+    """
+    shape = _fusion_shape(channels)
+    if out is None:
+        out = np.empty(shape + (np.shape(weights)[0],), dtype=dtype)
+    scratch = np.empty((2, min(chunk_size, shape[0])) + shape[1:], dtype=np.float32)
+    for start in range(0, shape[0], chunk_size):
+        chunk = [None if channel is None else channel[start:start + chunk_size] for channel in channels]
+        n_frames = len(out[start:start + chunk_size])
+        fuse_channels(chunk, weights, out=out[start:start + chunk_size], scratch=scratch[:, :n_frames])
+    return out
@@ -0,0 +1,249 @@
+"""
+Vectorized histograms of multi-channel images. The histograms of all channels are computed in one pass over a
+(H, W, C) view of the image, without splitting it into channels, and the cumulative distributions they hold can be
+reused for contrast corrections and display.
+"""
+from functools import cached_property
+
+import numpy as np
+
+
+def _as_channels(array):
+    """
+    Get a (n_pixels, C) view of an image, 2D images being considered as single-channel images
+
+    :param array: the image of shape (H, W) or (H, W, C)
+    :type array: ndarray
+    :return: the view
+    :rtype: ndarray
+    """
+    return array.reshape(-1, 1) if array.ndim == 2 else array.reshape(-1, array.shape[-1])
+
+
+def _bin_indices(values, bins, value_range):
+    """
+    Get the bin index of each value, allocating only the index array: integer values are binned with integer
+    arithmetic in place, other values are scaled in a float32 scratch array
+    """
+    low, high = value_range
+    span = high - low
+    if np.issubdtype(values.dtype, np.integer) and isinstance(low, (int, np.integer)) and 0 < span * bins < 2 ** 62:
+        indices = np.subtract(values, low, dtype=np.intp)
+        indices *= bins
+        indices //= int(span)
+    else:
+        scaled = np.subtract(values, low, dtype=np.float32)
+        scaled *= bins / span if span > 0 else 0
+        indices = np.empty(values.shape, dtype=np.intp)
+        np.copyto(indices, scaled, casting='unsafe')
+    return np.clip(indices, 0, bins - 1, out=indices)
+
+
+def default_chunk_size(frame_shape, max_bytes=64 * 1024 ** 2):
+    """
+    Get the number of frames whose bin indices fit in max_bytes, at least one
+
+    :param frame_shape: the shape of a frame, (H, W) or (H, W, C)
+    :type frame_shape: tuple of int
+    :param max_bytes: the maximum size of the bin indices of a chunk
+    :type max_bytes: int
+    :return: the number of frames
+    :rtype: int
+    """
+    return max(1, max_bytes // (int(np.prod(frame_shape)) * np.dtype(np.intp).itemsize))
+
+
+def default_range(array):
+    """
+    Get the range of values used by default to bin an image: the range of its values, the last bin of integer images
+    including their maximum value. Binning over the range of the data type would leave most bins empty for images
+    using only part of it, such as 12-bit images stored as uint16.
+
+    :param array: the image
+    :type array: ndarray
+    :return: the (low, high) range
+    :rtype: tuple
+    """
+    if np.issubdtype(array.dtype, np.integer):
+        return int(array.min()), int(array.max()) + 1
+    return float(array.min()), float(array.max())
+
+
+class Histogram:
+    """
+    The histograms of all channels of an image, with lazily computed cumulative distributions
+
+    :ivar counts: the counts, of shape (C, bins)
+    :ivar edges: the bin edges, of shape (bins + 1,)
+    """
+
+    def __init__(self, counts, edges):
+        self.counts = counts
+        self.edges = edges
+
+    @classmethod
+    def compute(cls, array, bins=64, value_range=None):
+        """
+        Compute the histograms of all channels of an image in one vectorized pass
+
+        :param array: the image of shape (H, W) or (H, W, C)
+        :type array: ndarray
+        :param bins: the number of bins
+        :type bins: int
+        :param value_range: the (low, high) range of the bins, see default_range() for the default
+        :type value_range: tuple
+        :return: the histograms
+        :rtype: Histogram
+        """
+        value_range = value_range or default_range(array)
+        pixels = _as_channels(array)
+        n_channels = pixels.shape[1]
+        indices = _bin_indices(pixels, bins, value_range)
+        indices += np.arange(n_channels) * bins
+        counts = np.bincount(indices.ravel(), minlength=n_channels * bins).reshape(n_channels, bins)
+        return cls(counts, np.linspace(*value_range, bins + 1))
+
+    @property
+    def centers(self):
+        """
+        The centres of bins
+        """
+        return (self.edges[:-1] + self.edges[1:]) / 2
+
+    @cached_property
+    def cdf(self):
+        """
+        The normalized cumulative distribution function of each channel, of shape (C, bins)
+        """
+        cdf = np.cumsum(self.counts, axis=-1, dtype=np.float64)
+        return cdf / np.maximum(cdf[:, -1:], 1)
+
+    def quantile(self, q):
+        """
+        Get the values below which a fraction q of pixels lie in each channel, interpolated linearly within bins
+
+        :param q: the fraction, between 0 and 1
+        :type q: float
+        :return: the values for each channel
+        :rtype: ndarray
+        """
+        return np.array([np.interp(q, np.concatenate(([0], cdf)), self.edges) for cdf in self.cdf])
+
+    def equalize(self, array, out=None):
+        """
+        Equalize an image with the cumulative distributions of the histograms, mapping values to [0, 1], interpolated
+        linearly within bins
+
+        :param array: the image the histograms were computed from
+        :type array: ndarray
+        :param out: the float array receiving the result, allocated if None
+        :type out: ndarray
+        :return: the equalized image
+        :rtype: ndarray
+        """
+        if out is None:
+            out = np.empty(array.shape, dtype=np.float32)
+        for c, cdf in enumerate(self.cdf):
+            channel = (Ellipsis, c) if array.ndim == 3 else Ellipsis
+            out[channel] = np.interp(array[channel], self.edges, np.concatenate(([0], cdf)))
+        return out
+
+    def stretch(self, array, low=0.02, high=0.98, out=None):
+        """
+        Stretch the contrast of an image, mapping the low and high quantiles of each channel to 0 and 1
+
+        :param array: the image the histograms were computed from
+        :type array: ndarray
+        :param low: the low quantile
+        :type low: float
+        :param high: the high quantile
+        :type high: float
+        :param out: the float array receiving the result, allocated if None
+        :type out: ndarray
+        :return: the stretched image
+        :rtype: ndarray
+        """
+        lows, highs = self.quantile(low), self.quantile(high)
+        if array.ndim == 2:
+            lows, highs = lows[0], highs[0]
+        out = np.subtract(array, lows, out=out, dtype=np.float32)
+        out /= np.maximum(highs - lows, np.finfo(np.float32).eps)
+        return np.clip(out, 0, 1, out=out)
+
+    def plot(self, ax, colors=None, **kwargs):
+        """
+        Plot the histograms
+
+        :param ax: the axes
+        :type ax: matplotlib.axes.Axes
+        :param colors: the colour of each channel
+        :type colors: list of str
+        """
+        for c, counts in enumerate(self.counts):
+            ax.plot(self.centers, counts, color=None if colors is None else colors[c], **kwargs)
+
+
+class HistogramCache:
+    """
+    A cache of histograms keyed by an identifier chosen by the caller, so that histograms and their cumulative
+    distributions are computed once and shared between corrections and display
+    """
+
+    def __init__(self):
+        self._histograms = {}
+
+    def get(self, key, array, bins=64, value_range=None):
+        """
+        Get the histograms of an image, computing them if they are not in the cache
+
+        :param key: the identifier of the image
+        :type key: hashable
+        :param array: the image
+        :type array: ndarray
+        :param bins: the number of bins
+        :type bins: int
+        :param value_range: the (low, high) range of the bins
+        :type value_range: tuple
+        :return: the histograms
+        :rtype: Histogram
+        """
+        if (key, bins, value_range) not in self._histograms:
+            self._histograms[(key, bins, value_range)] = Histogram.compute(array, bins=bins, value_range=value_range)
+        return self._histograms[(key, bins, value_range)]
+
+    def clear(self):
+        """
+        Empty the cache
+        """
+        self._histograms.clear()
+
+
+def running_histograms(stack, bins=64, value_range=None, chunk_size=None):
+    """
+    Compute the histograms of all channels of each frame of a time series, processing frames by chunks
+
+    :param stack: the images of shape (T, H, W) or (T, H, W, C)
+    :type stack: ndarray
+    :param bins: the number of bins
+    :type bins: int
+    :param value_range: the (low, high) range of the bins, common to all frames, see default_range() for the default
+    :type value_range: tuple
+    :param chunk_size: the number of frames processed at once, see default_chunk_size() for the default
+    :type chunk_size: int
+    :return: the counts of shape (T, C, bins) and the bin edges
+    :rtype: tuple(ndarray, ndarray)
+    """
+    value_range = value_range or default_range(stack)
+    chunk_size = chunk_size or default_chunk_size(stack.shape[1:])
+    n_frames = stack.shape[0]
+    n_channels = 1 if stack.ndim == 3 else stack.shape[-1]
+    counts = np.empty((n_frames, n_channels, bins), dtype=np.intp)
+    for start in range(0, n_frames, chunk_size):
+        frames = stack[start:start + chunk_size]
+        pixels = frames.reshape(len(frames), -1, n_channels)
+        indices = _bin_indices(pixels, bins, value_range)
+        indices += (np.arange(len(frames))[:, None, None] * n_channels + np.arange(n_channels)) * bins
+        counts[start:start + len(frames)] = np.bincount(indices.ravel(),
+                                                        minlength=len(frames) * n_channels * bins
+                                                        ).reshape(len(frames), n_channels, bins)
+    return counts, np.linspace(*value_range, bins + 1)
@@ -0,0 +1,210 @@
+"""
+A preprocessing pipeline reading image files concurrently and running CPU-bound image corrections in a pool of
+processes. Images are passed to and from the worker processes through shared memory, and corrected images are
+collected as soon as they are ready, either by iterating over the results or by polling them from a GUI timer.
+"""
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import multiprocessing
+from multiprocessing import shared_memory
+import os
+import site
+
+import numpy as np
+
+from instrumentation.metrics import add
+
+
+def _shared_array(shm, shape, dtype):
+    return np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _release(futures, blocks):
+    for future in futures:
+        future.cancel()
+    for shm in blocks:
+        shm.close()
+        shm.unlink()
+
+
+def _run_correction(source, shape, dtype, target, correction, kwargs):
+    """
+    Apply a correction to an image in shared memory and write the result as float32 into another shared memory block.
+    This is run in the worker processes.
+
+    :param source: the name of the shared memory block holding the image
+    :type source: str
+    :param shape: the image shape
+    :type shape: tuple of int
+    :param dtype: the image data type
+    :type dtype: str
+    :param target: the name of the shared memory block receiving the result
+    :type target: str
+    :param correction: the name of the Image method applying the correction
+    :type correction: str
+    :param kwargs: the keyword arguments of the correction method
+    :type kwargs: dict
+    """
+    from pydetecdiv.domain.Image import Image, ImgDType
+    source_shm = shared_memory.SharedMemory(name=source)
+    target_shm = shared_memory.SharedMemory(name=target)
+    try:
+        image = Image(_shared_array(source_shm, shape, dtype))
+        result = getattr(image, correction)(**kwargs).as_array(ImgDType.float32)
+        _shared_array(target_shm, shape, np.float32)[...] = result
+    finally:
+        source_shm.close()
+        target_shm.close()
+
+
+class PipelineResults:
+    """
+    The results of corrections submitted to the pipeline. They may be iterated over, blocking until each result is
+    ready, or polled with ready(), which never blocks and is suited to a GUI timer. Shared memory blocks are released
+    once all results have been collected, or by close(), which cancels the pending tasks. Using the results as a
+    context manager ensures that shared memory is released whether they have been collected or not.
+    """
+
+    def __init__(self, futures, blocks):
+        self._futures = futures
+        self._blocks = blocks
+        self._pending = set(futures)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+    def __iter__(self):
+        try:
+            for future in as_completed(list(self._pending)):
+                yield self._collect(future)
+        finally:
+            self.close()
+
+    @property
+    def done(self):
+        """
+        True if all results have been collected or the results have been closed
+        """
+        return not self._pending
+
+    def ready(self):
+        """
+        Collect the results that are ready, without waiting for the others
+
+        :return: (identifier, corrected image as a float32 array) tuples
+        :rtype: list of tuples
+        """
+        try:
+            results = [self._collect(future) for future in list(self._pending) if future.done()]
+        except Exception:
+            self.close()
+            raise
+        if not self._pending:
+            self.close()
+        return results
+
+    def _collect(self, future):
+        future.result()
+        self._pending.discard(future)
+        key, target, shape = self._futures[future]
+        return key, np.array(_shared_array(target, shape, np.float32))
+
+    def close(self):
+        """
+        Cancel the tasks that have not started and release the shared memory blocks. Results that have not been
+        collected are lost.
+        """
+        self._pending.clear()
+        _release(self._futures, self._blocks)
+        self._blocks = []
+
+
+class PreprocessingPipeline:
+    """
+    The preprocessing pipeline. Worker processes are started on first use and kept until close() is called, so that
+    the cost of starting them and importing their dependencies is only paid once. They are spawned rather than forked
+    as the GUI process runs Qt and TensorFlow threads, with the plugins directory added to their path.
+    """
+
+    def __init__(self, processes=None, threads=None):
+        self.processes = processes or os.cpu_count()
+        self.threads = threads or min(32, 4 * os.cpu_count())
+        self._executor = None
+
+    @property
+    def executor(self):
+        """
+        The process pool running the corrections
+        """
+        if self._executor is None:
+            plugins_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            self._executor = ProcessPoolExecutor(max_workers=self.processes,
+                                                 mp_context=multiprocessing.get_context('spawn'),
+                                                 initializer=site.addsitedir, initargs=(plugins_dir,))
+        return self._executor
+
+    def read(self, paths, reader=None):
+        """
+        Read image files concurrently
+
+        :param paths: the file paths
+        :type paths: list of str
+        :param reader: the function reading a file, tifffile.imread by default
+        :type reader: callable
+        :return: the images in the order of paths
+        :rtype: list of ndarray
+        """
+        if reader is None:
+            import tifffile
+            reader = tifffile.imread
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            arrays = list(executor.map(reader, paths))
+        add('image_bytes_read', sum(np.asarray(array).nbytes for array in arrays))
+        return arrays
+
+    def run(self, tasks):
+        """
+        Submit corrections to the process pool and return their results, see PipelineResults. A task is a (array,
+        correction, kwargs) tuple where correction is the name of an Image method (equalize_hist, stretch_contrast,
+        sigmoid_correction, ...). An array shared by several tasks is copied only once to shared memory. Tasks start
+        running immediately, before the results are collected.
+
+        :param tasks: the tasks keyed by an identifier
+        :type tasks: dict
+        :return: the results, yielding (identifier, corrected image as a float32 array) tuples in order of completion
+        :rtype: PipelineResults
+        """
+        inputs = {}
+        blocks = []
+        futures = {}
+        try:
+            for key, (array, correction, kwargs) in tasks.items():
+                if id(array) not in inputs:
+                    contiguous = np.ascontiguousarray(array)
+                    shm = shared_memory.SharedMemory(create=True, size=max(contiguous.nbytes, 1))
+                    blocks.append(shm)
+                    _shared_array(shm, contiguous.shape, contiguous.dtype)[...] = contiguous
+                    inputs[id(array)] = (shm, contiguous.shape, contiguous.dtype)
+                source, shape, dtype = inputs[id(array)]
+                target = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * 4, 1))
+                blocks.append(target)
+                future = self.executor.submit(_run_correction, source.name, shape, dtype.str, target.name, correction,
+                                              kwargs or {})
+                futures[future] = (key, target, shape)
+        except Exception:
+            _release(futures, blocks)
+            raise
+        return PipelineResults(futures, blocks)
+
+    def close(self):
+        """
+        Shut the worker processes down
+        """
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None